@@ -0,0 +1,62 @@
+"""Mărimea payload-ului /barcode și timpul de serializare, pe variante.
+
+Produsele vin din fixtures/off_sample.jsonl (sau din fișierul dat):
+
+    python -m bench.barcode_payload
+    python -m bench.barcode_payload fixtures/off_sample.jsonl --repetari 2000
+
+Varianta "inainte" reproduce calea veche: proiecția completă trecută prin
+jsonable_encoder și json.dumps, ca în JSONResponse-ul implicit al FastAPI.
+"""
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from routers.barcode import proiecteaza_produs
+from services.serializare import orjson, serializeaza
+
+
+def inainte(produs: dict) -> bytes:
+    continut = jsonable_encoder(proiecteaza_produs(produs, produs["code"]))
+    return json.dumps(continut, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+VARIANTE = {
+    "inainte": inainte,
+    "complet": lambda p: serializeaza(proiecteaza_produs(p, p["code"])),
+    "compact": lambda p: serializeaza(proiecteaza_produs(p, p["code"], compact=True)),
+    "fields+compact": lambda p: serializeaza(proiecteaza_produs(
+        p, p["code"], ["nume", "brand", "nutriscore", "nova", "nutrienti100g"], compact=True
+    )),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fisier", nargs="?", default="fixtures/off_sample.jsonl")
+    parser.add_argument("--repetari", type=int, default=1000)
+    args = parser.parse_args()
+
+    with open(args.fisier, encoding="utf-8") as f:
+        produse = [json.loads(linie) for linie in f if linie.strip()]
+
+    print(f"{len(produse)} produse x {args.repetari} repetări; encoder: {'orjson' if orjson else 'json'}")
+    baza = None
+    for nume, fn in VARIANTE.items():
+        marime = sum(len(fn(p)) for p in produse) / len(produse)
+        start = time.perf_counter()
+        for _ in range(args.repetari):
+            for p in produse:
+                fn(p)
+        us = (time.perf_counter() - start) / (args.repetari * len(produse)) * 1e6
+        baza = baza or (marime, us)
+        print(
+            f"  {nume:15} {marime:>8.0f} B ({marime / baza[0]:>5.0%})"
+            f"  {us:>8.2f} µs/răspuns ({us / baza[1]:>5.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Test de încărcare reproductibil pentru rutele principale ale backend-ului.
+
+Pornește stand-in-ul de upstream (bench/upstream.py) și backend-ul ca procese
+uvicorn separate, cu baze de date temporare, apoi trimite cereri la niveluri
+fixe de concurență și salvează rezultatele ca JSON:
+
+    python -m bench.incarcare                              # toate scenariile
+    python -m bench.incarcare --scenariu barcode --scenariu login --concurenta 1,10,50
+    python -m bench.incarcare --compara bench/rezultate/a.json bench/rezultate/b.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from bench.masurare import masoara
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REZULTATE_DIR = os.path.join(BACKEND_DIR, "bench", "rezultate")
+
+with open(os.path.join(BACKEND_DIR, "fixtures", "off_sample.jsonl"), encoding="utf-8") as f:
+    PRODUSE = [json.loads(linie) for linie in f if linie.strip()]
+
+COSURI = [
+    ["ouă", "spanac", "brânză feta"],
+    ["lapte", "ovăz", "banane"],
+    ["piept de pui", "orez", "broccoli"],
+]
+CONT = {"email": "bench@example.com", "password": "parola-bench"}
+
+
+# --- imagini EAN-13 generate local, pentru /decode-barcode ---
+
+_L = ["0001101", "0011001", "0010011", "0111101", "0100011", "0110001", "0101111", "0111011", "0110111", "0001011"]
+_G = [c[::-1].translate(str.maketrans("01", "10")) for c in _L]
+_R = [c.translate(str.maketrans("01", "10")) for c in _L]
+_PARITATE = ["LLLLLL", "LLGLGG", "LLGGLG", "LLGGGL", "LGLLGG", "LGGLLG", "LGGGLL", "LGLGLG", "LGLGGL", "LGGLGL"]
+
+
+def ean13(primele12: str) -> str:
+    suma = sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(primele12))
+    return primele12 + str((10 - suma % 10) % 10)
+
+
+def imagine_ean13(cod: str, modul: int = 3, inaltime: int = 120) -> bytes:
+    from PIL import Image, ImageDraw
+
+    cifre = [int(c) for c in cod]
+    biti = "101"
+    for cifra, paritate in zip(cifre[1:7], _PARITATE[cifre[0]]):
+        biti += (_L if paritate == "L" else _G)[cifra]
+    biti += "01010" + "".join(_R[c] for c in cifre[7:]) + "101"
+
+    margine = 12 * modul
+    image = Image.new("L", (len(biti) * modul + 2 * margine, inaltime + 2 * margine), 255)
+    desen = ImageDraw.Draw(image)
+    for i, bit in enumerate(biti):
+        if bit == "1":
+            x = margine + i * modul
+            desen.rectangle([x, margine, x + modul - 1, margine + inaltime], fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+# --- procese ---
+
+def port_liber() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def porneste(app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def asteapta(url: str, proces: subprocess.Popen, timeout: float = 30):
+    limita = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < limita:
+            if proces.poll() is not None:
+                raise RuntimeError(f"Procesul pentru {url} s-a oprit cu codul {proces.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} nu răspunde după {timeout} s")
+
+
+def mediu(temp: str, port_upstream: int, args) -> tuple[dict, dict]:
+    upstream = f"http://127.0.0.1:{port_upstream}"
+    env_upstream = {
+        **os.environ,
+        "BENCH_LATENTA_MS": str(args.latenta_ms),
+        "BENCH_JITTER_MS": str(args.jitter_ms),
+        "BENCH_RATA_ERORI": str(args.rata_erori),
+        "BENCH_SEED": str(args.seed),
+    }
+    env_backend = {
+        **os.environ,
+        "OFF_BASE_URL": upstream,
+        "CSE_BASE_URL": f"{upstream}/customsearch/v1",
+        "GEMINI_BASE_URL": upstream,
+        "DATABASE_URL": f"sqlite:///{os.path.join(temp, 'users.db')}",
+        "PRODUCT_CACHE_DB": os.path.join(temp, "products_cache.db"),
+        "PRODUCT_STORE_ENABLED": "0",
+        "MEDIA_DIR": os.path.join(temp, "media"),
+    }
+    return env_upstream, env_backend
+
+
+# --- scenarii ---
+
+def scenarii(client: httpx.AsyncClient) -> dict:
+    imagini = [imagine_ean13(ean13(p["code"][:12])) for p in PRODUSE[:4]]
+    return {
+        "barcode": lambda i: client.get(f"/barcode/{PRODUSE[i % len(PRODUSE)]['code']}"),
+        "scan-and-search": lambda i: client.post(
+            "/scan-and-search", data={"query": PRODUSE[i % len(PRODUSE)]["product_name"]}
+        ),
+        "decode-barcode": lambda i: client.post(
+            "/decode-barcode", files={"file": ("cod.png", imagini[i % len(imagini)], "image/png")}
+        ),
+        "alternatives": lambda i: client.post(
+            "/alternatives", json={"name": PRODUSE[i % len(PRODUSE)]["product_name"], "code": PRODUSE[i % len(PRODUSE)]["code"]}
+        ),
+        "reteta": lambda i: client.post("/reteta", json={"cos": COSURI[i % len(COSURI)]}),
+        "login": lambda i: client.post("/login", json=CONT),
+    }
+
+
+def commit_curent() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "necunoscut"
+
+
+async def ruleaza(args) -> dict:
+    niveluri = [int(c) for c in args.concurenta.split(",")]
+    with tempfile.TemporaryDirectory(prefix="healthyscan-bench-") as temp:
+        os.makedirs(os.path.join(temp, "media"))
+        os.makedirs(os.path.join(BACKEND_DIR, "media"), exist_ok=True)
+        port_upstream, port_backend = port_liber(), port_liber()
+        env_upstream, env_backend = mediu(temp, port_upstream, args)
+        subprocess.run([sys.executable, "run.py"], cwd=BACKEND_DIR, env=env_backend, check=True)
+
+        procese = [
+            porneste("bench.upstream:app", port_upstream, env_upstream),
+            porneste("main:app", port_backend, env_backend),
+        ]
+        try:
+            await asteapta(f"http://127.0.0.1:{port_upstream}/", procese[0])
+            await asteapta(f"http://127.0.0.1:{port_backend}/", procese[1])
+
+            limite = httpx.Limits(max_connections=max(niveluri), max_keepalive_connections=max(niveluri))
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port_backend}", limits=limite, timeout=args.timeout
+            ) as client:
+                await client.post("/register", json={**CONT, "first_name": "Bench", "last_name": "Bench"})
+                rute = scenarii(client)
+
+                rezultate = {}
+                for nume in args.scenariu or list(rute):
+                    apel = rute[nume]
+                    # Încălzire: conexiuni deschise, importuri leneșe, cache-uri populate
+                    await masoara(args.incalzire, 1, apel)
+                    rezultate[nume] = {}
+                    for concurenta in niveluri:
+                        r = await masoara(args.cereri, concurenta, apel)
+                        rezultate[nume][str(concurenta)] = r
+                        print(
+                            f"{nume:16} c={concurenta:<4} {r['req_s']:>8} req/s"
+                            f"  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  p99 {r['p99_ms']:>8} ms"
+                            f"  erori {r['erori']}"
+                        )
+        finally:
+            for proces in procese:
+                proces.terminate()
+            for proces in procese:
+                proces.wait(timeout=10)
+
+    return {
+        "commit": commit_curent(),
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "cereri": args.cereri,
+            "concurenta": niveluri,
+            "latenta_ms": args.latenta_ms,
+            "jitter_ms": args.jitter_ms,
+            "rata_erori": args.rata_erori,
+            "seed": args.seed,
+        },
+        "rezultate": rezultate,
+    }
+
+
+def compara(vechi_path: str, nou_path: str):
+    with open(vechi_path, encoding="utf-8") as f:
+        vechi = json.load(f)
+    with open(nou_path, encoding="utf-8") as f:
+        nou = json.load(f)
+
+    print(f"{vechi['commit']} -> {nou['commit']}")
+    for nume, niveluri in nou["rezultate"].items():
+        for concurenta, r in niveluri.items():
+            v = vechi["rezultate"].get(nume, {}).get(concurenta)
+            if v is None:
+                continue
+            delta = lambda cheie: (r[cheie] - v[cheie]) / v[cheie] * 100 if v[cheie] else 0.0
+            print(
+                f"{nume:16} c={concurenta:<4} req/s {delta('req_s'):+7.1f}%"
+                f"  p50 {delta('p50_ms'):+7.1f}%  p95 {delta('p95_ms'):+7.1f}%  p99 {delta('p99_ms'):+7.1f}%"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenariu", action="append", choices=["barcode", "scan-and-search", "decode-barcode", "alternatives", "reteta", "login"])
+    parser.add_argument("--concurenta", default="1,10,50", help="niveluri de concurență, separate prin virgulă")
+    parser.add_argument("--cereri", type=int, default=500, help="cereri per nivel de concurență")
+    parser.add_argument("--incalzire", type=int, default=20)
+    parser.add_argument("--latenta-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--rata-erori", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--iesire", help="fișierul JSON de rezultate (implicit în bench/rezultate/)")
+    parser.add_argument("--compara", nargs=2, metavar=("VECHI", "NOU"))
+    args = parser.parse_args()
+
+    if args.compara:
+        compara(*args.compara)
+        return
+
+    raport = asyncio.run(ruleaza(args))
+    iesire = args.iesire or os.path.join(
+        REZULTATE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{raport['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(iesire)), exist_ok=True)
+    with open(iesire, "w", encoding="utf-8") as f:
+        json.dump(raport, f, ensure_ascii=False, indent=1)
+    print(f"Rezultate salvate în {iesire}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+import math
+import time
+from collections import Counter
+from typing import Awaitable, Callable
+
+import httpx
+
+
+def percentila(durate_sortate: list[float], p: float) -> float:
+    # Metoda rangului cel mai apropiat
+    if not durate_sortate:
+        return 0.0
+    return durate_sortate[min(len(durate_sortate) - 1, max(0, math.ceil(p * len(durate_sortate)) - 1))]
+
+
+async def masoara(cereri: int, concurenta: int, apel: Callable[[int], Awaitable[httpx.Response]]) -> dict:
+    """Rulează `cereri` apeluri cu cel mult `concurenta` simultane.
+
+    Orice status diferit de 200 și orice excepție de transport sunt numărate ca erori.
+    """
+    semafor = asyncio.Semaphore(concurenta)
+    durate = []
+    statusuri = Counter()
+
+    async def una(i: int):
+        async with semafor:
+            start = time.perf_counter()
+            try:
+                response = await apel(i)
+                statusuri[str(response.status_code)] += 1
+            except httpx.HTTPError as e:
+                statusuri[type(e).__name__] += 1
+            durate.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(una(i) for i in range(cereri)))
+    total = time.perf_counter() - start
+    durate.sort()
+    return {
+        "cereri": cereri,
+        "concurenta": concurenta,
+        "req_s": round(cereri / total, 1),
+        "p50_ms": round(percentila(durate, 0.50), 2),
+        "p95_ms": round(percentila(durate, 0.95), 2),
+        "p99_ms": round(percentila(durate, 0.99), 2),
+        "erori": cereri - statusuri.get("200", 0),
+        "statusuri": dict(statusuri),
+    }
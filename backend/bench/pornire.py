@@ -0,0 +1,71 @@
+"""Timpul de import al aplicației și memoria rezidentă, pe configurații ROUTERS.
+
+Fiecare configurație rulează într-un proces Python nou, deci măsoară un cold start:
+
+    python -m bench.pornire
+    python -m bench.pornire --routers barcode,metrics --routers decode
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURATII = [
+    "scan,barcode,decode,auth,alternatives,recipes,metrics",
+    "barcode,metrics",
+    "decode",
+    "recipes",
+]
+MODULE_GRELE = ["google.generativeai", "PIL", "pyzbar", "cv2", "numpy", "sqlalchemy", "passlib"]
+
+# Rulează în procesul copil; RSS-ul maxim vine din getrusage (KB pe Linux)
+MASURARE = f"""
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+durata = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": round(durata * 1000, 1),
+    "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "rute": len(main.app.routes),
+    "module_grele": [m for m in {MODULE_GRELE!r} if m in sys.modules],
+}}))
+"""
+
+
+def masoara(routers: str, repetari: int) -> dict:
+    rezultate = []
+    for _ in range(repetari):
+        iesire = subprocess.run(
+            [sys.executable, "-c", MASURARE],
+            cwd=BACKEND_DIR,
+            env={**os.environ, "ROUTERS": routers},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        rezultate.append(json.loads(iesire.stdout.strip().splitlines()[-1]))
+    # Mediana pe import, ca o rulare cu cache-ul de disc rece să nu strice rezultatul
+    rezultate.sort(key=lambda r: r["import_ms"])
+    return rezultate[len(rezultate) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routers", action="append", help="valoare ROUTERS de măsurat (se poate repeta)")
+    parser.add_argument("--repetari", type=int, default=5)
+    args = parser.parse_args()
+
+    for routers in args.routers or CONFIGURATII:
+        r = masoara(routers, args.repetari)
+        print(
+            f"{routers:55} import {r['import_ms']:>8} ms  RSS {r['rss_mb']:>7} MB  rute {r['rute']:>3}"
+            f"  încărcate: {', '.join(r['module_grele']) or '—'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
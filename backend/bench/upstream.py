@@ -0,0 +1,123 @@
+"""Stand-in local pentru OpenFoodFacts, Google Custom Search și Gemini.
+
+Reia răspunsurile înregistrate din fixtures/ și adaugă latență și erori
+configurabile, ca benchmark-urile să nu depindă de serviciile reale:
+
+    BENCH_LATENTA_MS=80 BENCH_RATA_ERORI=0.01 uvicorn bench.upstream:app --port 9100
+"""
+import asyncio
+import json
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+BENCH_LATENTA_MS = float(os.getenv("BENCH_LATENTA_MS", "50"))
+BENCH_JITTER_MS = float(os.getenv("BENCH_JITTER_MS", "20"))
+BENCH_RATA_ERORI = float(os.getenv("BENCH_RATA_ERORI", "0"))
+BENCH_SEED = os.getenv("BENCH_SEED")
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+with open(os.path.join(FIXTURES, "off_sample.jsonl"), encoding="utf-8") as f:
+    PRODUSE = {p["code"]: p for p in (json.loads(linie) for linie in f if linie.strip())}
+with open(os.path.join(FIXTURES, "bench", "cse_search.json"), encoding="utf-8") as f:
+    CSE = json.load(f)
+with open(os.path.join(FIXTURES, "bench", "gemini.json"), encoding="utf-8") as f:
+    GEMINI = json.load(f)
+
+aleator = random.Random(BENCH_SEED)
+app = FastAPI()
+
+
+@app.middleware("http")
+async def latenta_si_erori(request: Request, call_next):
+    await asyncio.sleep(max(0.0, BENCH_LATENTA_MS + aleator.uniform(-BENCH_JITTER_MS, BENCH_JITTER_MS)) / 1000)
+    if aleator.random() < BENCH_RATA_ERORI:
+        return JSONResponse({"error": "eroare simulată"}, status_code=503)
+    return await call_next(request)
+
+
+def _campuri(produs: dict, fields: str | None) -> dict:
+    if not fields:
+        return produs
+    return {k: produs[k] for k in fields.split(",") if k in produs}
+
+
+# --- OpenFoodFacts ---
+
+@app.get("/api/v2/product/{code}.json")
+async def off_produs(code: str, fields: str | None = None):
+    produs = PRODUSE.get(code)
+    if produs is None:
+        return JSONResponse({"code": code, "status": 0, "status_verbose": "product not found"}, status_code=404)
+    return {"code": code, "status": 1, "product": _campuri(produs, fields)}
+
+
+@app.get("/api/v2/search")
+async def off_cautare_coduri(code: str = "", fields: str | None = None):
+    produse = [_campuri(PRODUSE[c], fields) for c in code.split(",") if c in PRODUSE]
+    return {"count": len(produse), "page": 1, "products": produse}
+
+
+@app.get("/cgi/search.pl")
+async def off_cautare(search_terms: str = "", page_size: int = 1):
+    termeni = search_terms.lower().split()
+    produse = [
+        p for p in PRODUSE.values()
+        if any(t in p.get("product_name", "").lower() for t in termeni)
+    ] or list(PRODUSE.values())
+    return {"count": len(produse), "products": produse[:page_size]}
+
+
+@app.get("/category/{slug}.json")
+async def off_categorie(slug: str, fields: str | None = None, page_size: int = 100):
+    produse = [
+        _campuri(p, fields) for p in PRODUSE.values()
+        if f"en:{slug}" in (p.get("categories_tags") or [])
+    ]
+    return {"count": len(produse), "products": produse[:page_size]}
+
+
+# --- Google Custom Search ---
+
+@app.get("/customsearch/v1")
+async def cse(q: str = ""):
+    return {**CSE, "queries": {"request": [{"searchTerms": q}]}}
+
+
+# --- Gemini (REST) ---
+
+def _text_gemini(corp: dict) -> str:
+    prompt = " ".join(
+        parte.get("text", "")
+        for continut in corp.get("contents", [])
+        for parte in continut.get("parts", [])
+    )
+    return GEMINI["reteta"] if "rețetă" in prompt else GEMINI["alternative"]
+
+
+def _candidat(text: str, final: bool = True) -> dict:
+    candidat = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if final:
+        candidat["finishReason"] = "STOP"
+    return {"candidates": [candidat]}
+
+
+@app.post("/v1beta/models/{model_actiune}")
+async def gemini(model_actiune: str, request: Request):
+    text = _text_gemini(await request.json())
+    if not model_actiune.endswith(":streamGenerateContent"):
+        return _candidat(text)
+
+    # Răspunsul în bucăți de câteva cuvinte, cu latența dintre tokeni
+    cuvinte = text.split(" ")
+    bucati = [" ".join(cuvinte[i:i + 8]) + " " for i in range(0, len(cuvinte), 8)]
+
+    async def evenimente():
+        for i, bucata in enumerate(bucati):
+            await asyncio.sleep(BENCH_LATENTA_MS / 1000 / len(bucati))
+            yield f"data: {json.dumps(_candidat(bucata, i == len(bucati) - 1), ensure_ascii=False)}\r\n\r\n"
+
+    return StreamingResponse(evenimente(), media_type="text/event-stream")
@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database.models import User
+
+# Migrări versionate, aplicate în ordine și o singură dată. O migrare nouă se
+# adaugă la finalul listei cu următorul număr; cele existente nu se modifică.
+metadata_migrari = MetaData()
+schema_version = Table(
+    "schema_version",
+    metadata_migrari,
+    Column("versiune", Integer, primary_key=True),
+    Column("nume", String, nullable=False),
+    Column("aplicat_la", DateTime, nullable=False),
+)
+
+
+def _v1_utilizatori(conn: Connection):
+    # Bazele create înainte de migrări (cu create_all) au deja tabela
+    User.__table__.create(conn, checkfirst=True)
+
+
+MIGRARI: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "utilizatori", _v1_utilizatori),
+]
+
+
+def _aplica(conn: Connection) -> list[int]:
+    schema_version.create(conn, checkfirst=True)
+    aplicate = set(conn.execute(select(schema_version.c.versiune)).scalars())
+    noi = []
+    for versiune, nume, migrare in MIGRARI:
+        if versiune in aplicate:
+            continue
+        migrare(conn)
+        conn.execute(schema_version.insert().values(versiune=versiune, nume=nume, aplicat_la=datetime.utcnow()))
+        noi.append(versiune)
+    return noi
+
+
+def _versiune_curenta(conn: Connection) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return max(conn.execute(select(schema_version.c.versiune)).scalars(), default=0)
+
+
+async def aplica_migrari(engine: AsyncEngine) -> list[int]:
+    # Fiecare rulare e o singură tranzacție: o migrare eșuată nu lasă schema pe jumătate
+    async with engine.begin() as conn:
+        return await conn.run_sync(_aplica)
+
+
+async def versiune_curenta(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        return await conn.run_sync(_versiune_curenta)
+
@@ -3,18 +3,63 @@ import os
 
 load_dotenv()
 
-from fastapi import FastAPI
+import importlib
+import sys
+from contextlib import asynccontextmanager
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from routers import scan, barcode  
-from routers import decode
-from routers import auth
-from routers import alternatives
-from routers import recipes
 from fastapi.staticfiles import StaticFiles
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from services import http_client
+from services import metrics
+from services.alternatives_index import alternatives_index
+from services.cache_partajat import cache_partajat
+from services.product_cache import product_cache
+from services.product_store import product_store
+
+# Grupurile de rute, în ordinea înregistrării. ROUTERS alege ce încarcă acest
+# proces, ex. ROUTERS=barcode,metrics pentru un pool care servește doar /barcode
+# fără Pillow, pyzbar sau SDK-ul Gemini.
+GRUPURI_RUTE = ["scan", "barcode", "decode", "auth", "alternatives", "recipes", "metrics"]
+ROUTERS = [g.strip() for g in os.getenv("ROUTERS", ",".join(GRUPURI_RUTE)).split(",") if g.strip()]
+necunoscute = set(ROUTERS) - set(GRUPURI_RUTE)
+if necunoscute:
+    raise ValueError(f"ROUTERS conține grupuri necunoscute: {', '.join(sorted(necunoscute))}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    http_client.get_client()
+    alternatives_index.porneste()
+    yield
+    await alternatives_index.opreste()
+    await http_client.close_client()
+    product_cache.close()
+    product_store.close()
+    cache_partajat.close()
+    # Pool-urile există doar dacă grupul lor a fost încărcat
+    for modul in ("services.barcode_decoder", "services.parole"):
+        if modul in sys.modules:
+            sys.modules[modul].inchide_pool()
+
+
+app = FastAPI(lifespan=lifespan)
+
+@app.middleware("http")
+async def masoara_cereri(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Șablonul rutei, nu calea concretă, ca numărul de serii să rămână mic
+        ruta = getattr(request.scope.get("route"), "path", "necunoscuta")
+        metrics.cereri_http.observa(
+            time.perf_counter() - start, metoda=request.method, ruta=ruta, status=status
+        )
 
-app = FastAPI()
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,10 +69,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(scan.router)
-app.include_router(barcode.router) 
-app.include_router(decode.router)
-app.include_router(auth.router)
-app.include_router(alternatives.router)
-app.mount("/media", StaticFiles(directory="media"), name="media")
-app.include_router(recipes.router)
+for grup in GRUPURI_RUTE:
+    if grup not in ROUTERS:
+        continue
+    app.include_router(importlib.import_module(f"routers.{grup}").router)
+    if grup == "auth":
+        # Avatarele vechi, încărcate înainte de stocarea după conținut
+        app.mount("/media", StaticFiles(directory="media"), name="media")
@@ -1,11 +1,10 @@
 from fastapi import APIRouter, HTTPException, Request
-import requests
-from services.recipes_service import model
-
-router = APIRouter()
-
-from fastapi import APIRouter, HTTPException, Request
-import requests
+from services.alternatives_index import alternatives_index
+from services.planificator import ResursaOcupata
+from services.openfoodfacts import get_product, rezolva_nume, descarca_categorie, EroareOpenFoodFacts
+from services.recipes_service import genereaza_text, genereaza_text_stream
+from services.search_cache import normalizeaza_query
+from services.sse import eveniment, raspuns_sse
 
 router = APIRouter()
 
@@ -14,68 +13,82 @@ async def get_healthier_alternatives(request: Request):
     body = await request.json()
     product_name = body.get("name", "").strip()
     fallback_category = body.get("categorie", "").strip()
+    code = str(body.get("code", "")).strip()
+    detalii = bool(body.get("detalii", False))
+    try:
+        limit = max(1, min(int(body.get("limit", 3) or 3), 20))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="limit trebuie să fie un număr")
 
     if not product_name:
         raise HTTPException(status_code=400, detail="Missing product name")
 
-    # 1. Căutăm produsul pe OpenFoodFacts
-    search_url = f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={product_name}&json=1&page_size=1"
-    resp = requests.get(search_url)
-
-    if resp.status_code != 200:
-        raise HTTPException(status_code=500, detail="Eroare la căutarea produsului")
-
-    products_found = resp.json().get("products", [])
-    if not products_found:
-        raise HTTPException(status_code=404, detail="Produs negăsit")
-
-    produs = products_found[0]
-    categories_tags = produs.get("categories_tags", [])
-
-    # 2. Alegem o categorie generală potrivită
-    category_slug = None
-    for tag in categories_tags:
-        if tag.startswith("en:") and len(tag.split(":")[-1]) > 3:
-            category_slug = tag.split(":")[-1]
+    # 1. Categoriile produsului: din codul de bare dacă îl avem, altfel căutăm pe OpenFoodFacts
+    categories_tags = []
+    if code:
+        try:
+            produs = await get_product(code)
+        except EroareOpenFoodFacts:
+            produs = None
+        if produs:
+            categories_tags = produs.get("categories_tags") or []
+
+    if not categories_tags:
+        try:
+            produs_gasit = await rezolva_nume(product_name)
+        except EroareOpenFoodFacts:
+            raise HTTPException(status_code=500, detail="Eroare la căutarea produsului")
+
+        if not produs_gasit:
+            raise HTTPException(status_code=404, detail="Produs negăsit")
+
+        categories_tags = produs_gasit.get("categories_tags", [])
+
+    # 2. Preferăm cea mai specifică categorie deja indexată. O categorie cu doar
+    # câteva produse văzute la /barcode nu e completă: rezultatul ei rămâne
+    # doar rezervă dacă descărcarea categoriei de mai jos nu dă nimic.
+    slugs = [
+        tag.split(":")[-1] for tag in categories_tags
+        if tag.startswith("en:") and len(tag.split(":")[-1]) > 3
+    ]
+    sugestii = []
+    partiale = []
+    for slug in reversed(slugs):
+        gasite = alternatives_index.cauta(slug, product_name, limit)
+        if gasite and (len(gasite) >= limit or alternatives_index.categorie_cunoscuta(slug)):
+            sugestii = gasite
             break
+        partiale = partiale or gasite
 
-    if not category_slug and fallback_category:
-        category_slug = fallback_category.replace(" ", "-").lower()
-
-    if not category_slug:
-        raise HTTPException(status_code=404, detail="Fără categorie validă")
-
-    # 3. Căutăm produse în acea categorie
-    category_url = f"https://world.openfoodfacts.org/category/{category_slug}.json"
-    r = requests.get(category_url)
-
-    if r.status_code != 200:
-        raise HTTPException(status_code=500, detail="Eroare la accesarea categoriei")
+    # 3. Altfel alegem o categorie generală și o aducem în index de la OpenFoodFacts
+    if not sugestii:
+        category_slug = slugs[0] if slugs else None
+        if not category_slug and fallback_category:
+            category_slug = fallback_category.replace(" ", "-").lower()
 
-    produse = r.json().get("products", [])
-    sugestii = []
+        if not category_slug:
+            raise HTTPException(status_code=404, detail="Fără categorie validă")
 
-    for p in produse:
-        nume = p.get("product_name", "").strip()
-        scor = p.get("nutriscore_grade", "").upper()
+        if not alternatives_index.categorie_cunoscuta(category_slug):
+            try:
+                produse = await descarca_categorie(category_slug)
+            except EroareOpenFoodFacts:
+                if not partiale:
+                    raise HTTPException(status_code=500, detail="Eroare la accesarea categoriei")
+                produse = []
+            else:
+                alternatives_index.adauga_categorie(category_slug, produse)
 
-        if (
-            scor in ["A", "B", "C"]
-            and nume
-            and nume.lower() != product_name.lower()
-            and len(nume) > 3
-        ):
-            sugestii.append(nume)
+        sugestii = alternatives_index.cauta(category_slug, product_name, limit) or partiale
 
-    # 4. Eliminăm duplicate
-    sugestii_unice = list(dict.fromkeys(sugestii))
+    if detalii:
+        return sugestii
 
-    return sugestii_unice[:3] if sugestii_unice else ["Nu am găsit alternative mai sănătoase."]
+    nume = [s["nume"] for s in sugestii]
+    return nume if nume else ["Nu am găsit alternative mai sănătoase."]
 
 
-@router.post("/alternatives-ai")
-async def ai_suggestions_only(request: Request):
-    body = await request.json()
+async def prompt_alternative_ai(body: dict) -> tuple[str, tuple, str]:
     product_name = body.get("name", "").strip()
     nutriscore = body.get("nutriscore", "").upper().strip()
     fallback_category = body.get("categorie", "").strip()
@@ -86,35 +99,86 @@ async def ai_suggestions_only(request: Request):
     # Obține categoria
     category_slug = None
     if not fallback_category:
-        search_url = f"https://world.openfoodfacts.org/cgi/search.pl?search_terms={product_name}&json=1&page_size=1"
-        resp = requests.get(search_url)
-        if resp.status_code == 200:
-            results = resp.json().get("products", [])
-            if results:
-                tags = results[0].get("categories_tags", [])
-                if tags:
-                    category_slug = tags[0].split(":")[-1]
+        try:
+            produs_gasit = await rezolva_nume(product_name)
+        except EroareOpenFoodFacts:
+            produs_gasit = None
+        if produs_gasit:
+            tags = produs_gasit.get("categories_tags", [])
+            if tags:
+                category_slug = tags[0].split(":")[-1]
     else:
         category_slug = fallback_category.replace(" ", "-").lower()
 
     if not category_slug:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    categorie_umanoida = category_slug.replace("-", " ")
     prompt = (
         f"Produsul {product_name} are un scor NutriScore {nutriscore}. Este luat din baza de date OpenFoodFacts. "
         f"Oferă-mi 3 alternative mai sănătoase, naturale, ca sa inlocuiesc  {product_name}, deci ceva din aceeasi categorie. Răspunde cu o listă simplă."
     )
+    return prompt, ("alternative", normalizeaza_query(product_name), nutriscore), category_slug
+
+
+def extrage_sugestii(text: str) -> list[str]:
+    lines = text.strip().splitlines()
+    suggestions = [
+        line.lstrip("-•1234567890. ").strip()
+        for line in lines if line.strip()
+    ]
+    return suggestions[:3]
+
+
+def sugestii_din_index(body: dict, category_slug: str) -> list[str]:
+    # Când cota Gemini e ocupată, răspundem din indexul local de alternative
+    sugestii = alternatives_index.cauta(category_slug, body.get("name", "").strip(), 3)
+    return [s["nume"] for s in sugestii]
+
+
+@router.post("/alternatives-ai")
+async def ai_suggestions_only(request: Request):
+    body = await request.json()
+    prompt, cheie, category_slug = await prompt_alternative_ai(body)
 
     try:
-        result = model.generate_content(prompt)
-        lines = result.text.strip().splitlines()
-        suggestions = [
-            line.lstrip("-•1234567890. ").strip()
-            for line in lines if line.strip()
-        ]
+        suggestions = extrage_sugestii(await genereaza_text(prompt, cheie))
+    except ResursaOcupata as e:
+        suggestions = sugestii_din_index(body, category_slug)
+        if not suggestions:
+            raise HTTPException(
+                status_code=503, detail=str(e), headers={"Retry-After": str(int(e.reincearca_dupa))}
+            )
+        return {"suggestions": suggestions, "sursa": "index"}
     except Exception as e:
         print("❌ Gemini error:", e)
         raise HTTPException(status_code=500, detail="AI generation failed")
 
-    return {"suggestions": suggestions[:3]}
+    return {"suggestions": suggestions}
+
+
+@router.post("/alternatives-ai/stream")
+async def ai_suggestions_stream(request: Request):
+    # SSE: textul brut pe bucăți, apoi "done" cu lista de sugestii extrasă
+    body = await request.json()
+    prompt, cheie, category_slug = await prompt_alternative_ai(body)
+
+    async def evenimente():
+        bucati = []
+        try:
+            async for bucata in genereaza_text_stream(prompt, cheie):
+                bucati.append(bucata)
+                yield eveniment({"text": bucata})
+        except ResursaOcupata as e:
+            suggestions = sugestii_din_index(body, category_slug)
+            if suggestions:
+                yield eveniment({"suggestions": suggestions, "sursa": "index"}, "done")
+            else:
+                yield eveniment({"detail": str(e), "retry_after": int(e.reincearca_dupa)}, "error")
+            return
+        except Exception as e:
+            print("❌ Gemini error:", e)
+            yield eveniment({"detail": "AI generation failed"}, "error")
+            return
+        yield eveniment({"suggestions": extrage_sugestii("".join(bucati))}, "done")
+
+    return raspuns_sse(evenimente())
@@ -1,20 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
+from fastapi.responses import FileResponse, Response
+import asyncio
 import os
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import update as update_stmt
 from sqlalchemy.future import select
 import jwt
 from jwt import PyJWTError
-from passlib.hash import bcrypt
 from datetime import datetime, timedelta
 from database.models import User
 from database.session import AsyncSessionLocal
-from uuid import uuid4
+from services.avatars import EroareAvatar, TIPURI_MEDIA, cale_avatar, salveaza_avatar
+from services.parole import hash_parola, verifica_parola
+from services.token_cache import token_cache
 
 router = APIRouter()
 
 SECRET_KEY = "cheie_super_secreta"
 ALGORITHM = "HS256"
+# Adresa publică a backend-ului pentru URL-urile de avatar; implicit cea din cerere
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -43,7 +49,7 @@ async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="Email deja folosit")
 
-    hashed_password = bcrypt.hash(user.password)
+    hashed_password = await hash_parola(user.password)
     new_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -60,7 +66,7 @@ async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == user.email))
     db_user = result.scalar_one_or_none()
 
-    if not db_user or not bcrypt.verify(user.password, db_user.hashed_password):
+    if not db_user or not await verifica_parola(user.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Email sau parolă greșite")
 
     token_data = {
@@ -84,57 +90,87 @@ def verify_token(token: str):
         raise HTTPException(status_code=401, detail="Token invalid")
 
 
-@router.get("/me")
-async def get_me(token: str, db: AsyncSession = Depends(get_db)):
+async def utilizator_curent(token: str, db: AsyncSession) -> dict:
+    # Token-urile deja verificate sunt servite din cache, fără JWT și fără SELECT
+    utilizator = token_cache.get(token)
+    if utilizator is not None:
+        return utilizator
+
     data = verify_token(token)
     result = await db.execute(select(User).where(User.email == data["sub"]))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return {
+    utilizator = {
+        "id": user.id,
         "email": user.email,
         "first_name": user.first_name,
-        "last_name": user.last_name
+        "last_name": user.last_name,
+        "avatar_url": user.avatar_url,
+    }
+    token_cache.set(token, utilizator, data["exp"])
+    return utilizator
+
+
+@router.get("/me")
+async def get_me(token: str, db: AsyncSession = Depends(get_db)):
+    user = await utilizator_curent(token, db)
+
+    return {
+        "email": user["email"],
+        "first_name": user["first_name"],
+        "last_name": user["last_name"]
     }
 
 
 @router.put("/update-profile")
 async def update_profile(update: UserUpdate, token: str, db: AsyncSession = Depends(get_db)):
-    data = verify_token(token)
-    result = await db.execute(select(User).where(User.email == data["sub"]))
-    user = result.scalar_one_or_none()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = await utilizator_curent(token, db)
 
+    valori = {}
     if update.first_name:
-        user.first_name = update.first_name
+        valori["first_name"] = update.first_name
     if update.last_name:
-        user.last_name = update.last_name
+        valori["last_name"] = update.last_name
     if update.avatar_url:
-        user.avatar_url = update.avatar_url
+        valori["avatar_url"] = update.avatar_url
 
-    await db.commit()
+    if valori:
+        await db.execute(update_stmt(User).where(User.id == user["id"]).values(**valori))
+        await db.commit()
+        token_cache.invalideaza(user["email"])
     return {"msg": "Profil actualizat"}
 
 @router.post("/upload-avatar")
-async def upload_avatar(file: UploadFile = File(...), token: str = "", db: AsyncSession = Depends(get_db)):
-    data = verify_token(token)
-    result = await db.execute(select(User).where(User.email == data["sub"]))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def upload_avatar(request: Request, file: UploadFile = File(...), token: str = "", db: AsyncSession = Depends(get_db)):
+    user = await utilizator_curent(token, db)
+
+    try:
+        fisiere = await salveaza_avatar(file)
+    except EroareAvatar as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    baza = PUBLIC_BASE_URL or str(request.base_url).rstrip("/")
+    original_url = f"{baza}/avatars/{fisiere['original']}"
+    miniaturi = {str(latura): f"{baza}/avatars/{nume}" for latura, nume in fisiere["miniaturi"].items()}
+    # Avatarul e afișat mic peste tot, deci salvăm cea mai mare miniatură, nu originalul
+    avatar_url = miniaturi[str(max(fisiere["miniaturi"]))] if miniaturi else original_url
+    await db.execute(update_stmt(User).where(User.id == user["id"]).values(avatar_url=avatar_url))
+    await db.commit()
+    token_cache.invalideaza(user["email"])
 
-    ext = os.path.splitext(file.filename)[1]
-    filename = f"{uuid4().hex}{ext}"
-    filepath = os.path.join("media", filename)
+    return {"avatar_url": avatar_url, "original_url": original_url, "miniaturi": miniaturi}
 
-    with open(filepath, "wb") as f:
-        f.write(await file.read())
 
-    avatar_url = f"http://192.168.0.102:8000/media/{filename}" 
-    user.avatar_url = avatar_url
-    await db.commit()
+@router.get("/avatars/{nume}")
+async def get_avatar(nume: str, request: Request):
+    cale = await asyncio.to_thread(cale_avatar, nume)
+    if cale is None:
+        raise HTTPException(status_code=404, detail="Avatar negăsit")
 
-    return {"avatar_url": avatar_url}
\ No newline at end of file
+    # Numele derivă din conținut, deci fișierul de la un URL nu se schimbă niciodată
+    antete = {"ETag": f'"{nume}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    if request.headers.get("if-none-match") in (antete["ETag"], "*"):
+        return Response(status_code=304, headers=antete)
+    return FileResponse(cale, media_type=TIPURI_MEDIA[nume.rpartition(".")[2]], headers=antete)
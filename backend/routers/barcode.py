@@ -1,99 +1,171 @@
-from fastapi import APIRouter, HTTPException
-import requests
+import os
+from typing import List
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from services.openfoodfacts import get_product, get_products, EroareOpenFoodFacts
 from services.search import search_google_cse
+from services.search_cache import search_cache
+from services.serializare import raspuns_conditionat, serializeaza
 from urllib.parse import urlparse
 router = APIRouter()
 
-@router.get("/barcode/{code}")
-def lookup_barcode(code: str):
-    url = f"https://world.openfoodfacts.org/api/v2/product/{code}.json"
-    response = requests.get(url)
+BARCODE_BATCH_MAX = int(os.getenv("BARCODE_BATCH_MAX", "300"))
+# Produsele se schimbă rar; prețurile din căutare mai des
+BARCODE_CACHE_CONTROL = os.getenv("BARCODE_CACHE_CONTROL", "public, max-age=3600, stale-while-revalidate=86400")
+BARCODE_SEARCH_CACHE_CONTROL = os.getenv("BARCODE_SEARCH_CACHE_CONTROL", "public, max-age=600, stale-while-revalidate=3600")
+
+class BarcodeBatch(BaseModel):
+    coduri: List[str]
+
+# Ordinea fixă a nutrienților în modul compact; clienții o citesc din /barcode-fields
+NUTRIENTI_CHEIE = [
+    "energy-kcal", "energy", "salt", "sugars", "fat", "proteins", "fiber",
+    "saturated-fat", "sodium", "carbohydrates", "cholesterol", "trans-fat",
+    "calcium", "iron", "potassium", "magnesium", "vitamin-a", "vitamin-c",
+    "vitamin-d", "vitamin-e", "omega-3-fat", "omega-6-fat"
+]
+# Cheile importante în ordinea de afișare: bază, per 100g, per porție
+ORDINE_NUTRIENTI = [
+    cheie for n in NUTRIENTI_CHEIE for cheie in (n, f"{n}_100g", f"{n}_serving")
+]
+
+CAMPURI_BARCODE = [
+    "brand", "nume", "cantitate", "nutriscore", "nova", "ecoscore", "categorie",
+    "nutrienti100g", "nutrientiPortie", "alergeni", "aditivi", "origine", "etichete",
+    "generic_name", "ambalaj", "code", "nutrienti", "serving_size",
+]
+
+
+def parseaza_campuri(fields: str | None) -> list[str] | None:
+    if not fields:
+        return None
+    campuri = [c.strip() for c in fields.split(",") if c.strip()]
+    necunoscute = [c for c in campuri if c not in CAMPURI_BARCODE]
+    if necunoscute:
+        raise HTTPException(status_code=400, detail=f"Câmpuri necunoscute: {', '.join(necunoscute)}")
+    return campuri
+
+
+@router.get("/barcode-fields")
+async def barcode_fields():
+    return {"campuri": CAMPURI_BARCODE, "nutrienti_compact": NUTRIENTI_CHEIE}
 
-    if response.status_code != 200:
+
+@router.get("/barcode/{code}")
+async def lookup_barcode(request: Request, code: str, fields: str | None = None, compact: bool = False):
+    campuri = parseaza_campuri(fields)
+    try:
+        produs = await get_product(code)
+    except EroareOpenFoodFacts:
         raise HTTPException(status_code=500, detail="Eroare la OpenFoodFacts")
 
-    data = response.json()
-    if data.get("status") != 1:
+    if produs is None:
         raise HTTPException(status_code=404, detail="Produs negăsit")
 
-    produs = data["product"]
-    brand = produs.get("brands", "necunoscut")
-    nume = produs.get("product_name", "necunoscut")
-    cantitate = produs.get("quantity", "")
-    nutriscore = produs.get("nutriscore_grade", "necunoscut").upper()
-    nova = str(produs.get("nova_group", "necunoscut"))
-    ecoscore = produs.get("ecoscore_grade", "necunoscut").upper()
-    categorie = produs.get("categories", "necunoscut")
-    generic_name = produs.get("generic_name", "")
-    ambalaj = produs.get("packaging", "")
-    origine = produs.get("ingredients_origin", "")
-    etichete = produs.get("labels_tags", [])
-    alergeni = produs.get("allergens_tags", [])
-    aditivi = produs.get("additives_tags", [])
+    return raspuns_conditionat(
+        request,
+        proiecteaza_produs(produs, code, campuri, compact),
+        BARCODE_CACHE_CONTROL,
+        _timestamp(produs.get("last_modified_t")),
+    )
 
-    nutrienti = produs.get("nutriments", {})
-    nutrienti100g = ", ".join([
-        f"{k}: {v}" for k, v in nutrienti.items()
-        if not k.endswith("_unit") and "_100g" in k
-    ]) or "—"
-    nutrientiPortie = ", ".join([
-        f"{k}: {v}" for k, v in nutrienti.items()
-        if not k.endswith("_unit") and "_serving" in k
-    ]) or "—"
-    
-    # Extrage toate valorile nutriționale importante
-    # Creează un dicționar complet cu toate valorile disponibile
-    nutrienti_completi = {}
-    
-    # Lista de nutrienți importanți de extras
-    nutrienti_cheie = [
-        "energy-kcal", "energy", "salt", "sugars", "fat", "proteins", "fiber", 
-        "saturated-fat", "sodium", "carbohydrates", "cholesterol", "trans-fat",
-        "calcium", "iron", "potassium", "magnesium", "vitamin-a", "vitamin-c",
-        "vitamin-d", "vitamin-e", "omega-3-fat", "omega-6-fat"
-    ]
-    
-    # Extrage toate valorile pentru fiecare nutrient (bază, _100g, _serving)
-    for nutrient in nutrienti_cheie:
-        # Valoare de bază
-        if nutrient in nutrienti:
-            nutrienti_completi[nutrient] = nutrienti.get(nutrient, 0)
-        
-        # Valoare per 100g
-        key_100g = f"{nutrient}_100g"
-        if key_100g in nutrienti:
-            nutrienti_completi[key_100g] = nutrienti.get(key_100g, 0)
-        
-        # Valoare per porție
-        key_serving = f"{nutrient}_serving"
-        if key_serving in nutrienti:
-            nutrienti_completi[key_serving] = nutrienti.get(key_serving, 0)
-    
-    # Adaugă și toate celelalte valori disponibile
+
+def _timestamp(valoare) -> float | None:
+    try:
+        return float(valoare) or None
+    except (TypeError, ValueError):
+        return None
+
+
+def _numeric(valoare) -> float | None:
+    if isinstance(valoare, bool):
+        return None
+    if isinstance(valoare, (int, float)):
+        return valoare
+    try:
+        return float(valoare)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fara_prefix(tags: list[str]) -> list[str]:
+    return [t.replace("en:", "") for t in tags]
+
+
+# Fiecare câmp se calculează doar dacă este cerut
+_EXTRACTOARE = {
+    "brand": lambda p, n: p.get("brands", "necunoscut"),
+    "nume": lambda p, n: p.get("product_name", "necunoscut"),
+    "cantitate": lambda p, n: p.get("quantity", ""),
+    "nutriscore": lambda p, n: p.get("nutriscore_grade", "necunoscut").upper(),
+    "nova": lambda p, n: str(p.get("nova_group", "necunoscut")),
+    "ecoscore": lambda p, n: p.get("ecoscore_grade", "necunoscut").upper(),
+    "categorie": lambda p, n: p.get("categories", "necunoscut"),
+    "nutrienti100g": lambda p, n: ", ".join(
+        f"{k}: {v}" for k, v in n.items() if not k.endswith("_unit") and "_100g" in k
+    ) or "—",
+    "nutrientiPortie": lambda p, n: ", ".join(
+        f"{k}: {v}" for k, v in n.items() if not k.endswith("_unit") and "_serving" in k
+    ) or "—",
+    "alergeni": lambda p, n: _fara_prefix(p.get("allergens_tags", [])),
+    "aditivi": lambda p, n: _fara_prefix(p.get("additives_tags", [])),
+    "origine": lambda p, n: p.get("ingredients_origin", ""),
+    "etichete": lambda p, n: _fara_prefix(p.get("labels_tags", [])),
+    "generic_name": lambda p, n: p.get("generic_name", ""),
+    "ambalaj": lambda p, n: p.get("packaging", ""),
+    "nutrienti": lambda p, n: _nutrienti_completi(n),
+    "serving_size": lambda p, n: p.get("serving_size", ""),
+}
+
+# În modul compact nutrienții devin liste numerice în ordinea NUTRIENTI_CHEIE
+_EXTRACTOARE_COMPACT = {
+    **_EXTRACTOARE,
+    "nutrienti100g": lambda p, n: [_numeric(n.get(f"{k}_100g")) for k in NUTRIENTI_CHEIE],
+    "nutrientiPortie": lambda p, n: [_numeric(n.get(f"{k}_serving")) for k in NUTRIENTI_CHEIE],
+    "nutrienti": lambda p, n: [_numeric(n.get(k)) for k in NUTRIENTI_CHEIE],
+}
+
+
+def _nutrienti_completi(nutrienti: dict) -> dict:
+    # Întâi nutrienții importanți, apoi toate celelalte valori disponibile
+    completi = {k: nutrienti[k] for k in ORDINE_NUTRIENTI if k in nutrienti}
     for key, value in nutrienti.items():
-        if not key.endswith("_unit") and key not in nutrienti_completi:
-            nutrienti_completi[key] = value
-
-    return {
-        "brand": brand,
-        "nume": nume,
-        "cantitate": cantitate,
-        "nutriscore": nutriscore,
-        "nova": nova,
-        "ecoscore": ecoscore,
-        "categorie": categorie,
-        "nutrienti100g": nutrienti100g,
-        "nutrientiPortie": nutrientiPortie,
-        "alergeni": [a.replace("en:", "") for a in alergeni],
-        "aditivi": [a.replace("en:", "") for a in aditivi],
-        "origine": origine,
-        "etichete": [e.replace("en:", "") for e in etichete],
-        "generic_name": generic_name,
-        "ambalaj": ambalaj,
-        "code": code,
-        "nutrienti": nutrienti_completi,
-        "serving_size": produs.get("serving_size", ""),
-    }
+        if not key.endswith("_unit") and key not in completi:
+            completi[key] = value
+    return completi
+
+
+def proiecteaza_produs(produs: dict, code: str, campuri: list[str] | None = None, compact: bool = False) -> dict:
+    extractoare = _EXTRACTOARE_COMPACT if compact else _EXTRACTOARE
+    nutrienti = produs.get("nutriments", {})
+    rezultat = {}
+    for camp in campuri or CAMPURI_BARCODE:
+        rezultat[camp] = code if camp == "code" else extractoare[camp](produs, nutrienti)
+    return rezultat
+
+
+@router.post("/barcode/batch")
+async def lookup_barcode_batch(data: BarcodeBatch, fields: str | None = None, compact: bool = False):
+    campuri = parseaza_campuri(fields)
+    coduri = list(dict.fromkeys(c.strip() for c in data.coduri if c.strip()))
+    if not coduri:
+        raise HTTPException(status_code=400, detail="Lista de coduri este goală")
+    if len(coduri) > BARCODE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Maxim {BARCODE_BATCH_MAX} coduri per cerere")
+
+    # NDJSON: câte o linie per cod, în ordinea în care sunt rezolvate
+    async def linii():
+        async for code, produs, eroare in get_products(coduri):
+            if eroare:
+                linie = {"code": code, "status": "eroare", "detail": "Eroare la OpenFoodFacts"}
+            elif produs is None:
+                linie = {"code": code, "status": "negasit"}
+            else:
+                linie = {"code": code, "status": "ok", "produs": proiecteaza_produs(produs, code, campuri, compact)}
+            yield serializeaza(linie) + b"\n"
+
+    return StreamingResponse(linii(), media_type="application/x-ndjson")
 
 
 def grupare_dupa_magazin(rezultate: list[dict]) -> dict:
@@ -108,27 +180,38 @@ def grupare_dupa_magazin(rezultate: list[dict]) -> dict:
     return grouped
 
 @router.get("/barcode-search/{code}")
-def cauta_dupa_cod_barcode(code: str):
-    url = f"https://world.openfoodfacts.org/api/v2/product/{code}.json"
-    response = requests.get(url)
+async def cauta_dupa_cod_barcode(request: Request, code: str):
+    """Produsul și rezultatele din magazine, cu ETag și 304.
 
-    if response.status_code != 200:
+    Revalidarea e ieftină cât timp căutarea e în cache (SEARCH_CACHE_TTL):
+    ETag-ul se calculează din rezultatul din cache, fără apel Custom Search.
+    După expirarea lui, validatorul nu poate fi cunoscut fără o căutare nouă,
+    deci și o cerere condiționată consumă atunci o interogare din cotă.
+    """
+    try:
+        produs = await get_product(code)
+    except EroareOpenFoodFacts:
         raise HTTPException(status_code=500, detail="Eroare la OpenFoodFacts")
 
-    data = response.json()
-    if data.get("status") != 1:
+    if produs is None:
         raise HTTPException(status_code=404, detail="Produs negăsit")
 
-    produs = data["product"]
     nume = produs.get("product_name", "necunoscut")
     brand = produs.get("brands", "").split(",")[0].strip()  
     query = f"{brand} {nume}".lower().strip() if brand else nume.lower().strip()
 
-    rezultate = search_google_cse(query)
+    # Întâi cache-ul local sau partajat: de aici vine validatorul pentru If-None-Match
+    await search_cache.incarca_partajat(query)
+    rezultate = search_cache.get(query, numara=False)
+    if rezultate is None:
+        rezultate = await search_google_cse(query)
+    else:
+        search_cache.hits += 1
     grupate = grupare_dupa_magazin(rezultate)
 
-    return {
-        "nume": nume,
-        "query": query,
-        "magazine": grupate
-    }
+    return raspuns_conditionat(
+        request,
+        {"nume": nume, "query": query, "magazine": grupate},
+        BARCODE_SEARCH_CACHE_CONTROL,
+        search_cache.salvat_la(query),
+    )
@@ -1,28 +1,105 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pyzbar.pyzbar import decode
-from PIL import Image
-import numpy as np
-import cv2
-import io
+import asyncio
+import os
+import time
+from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response, WebSocket, WebSocketDisconnect
+from services.barcode_decoder import decodeaza, decodeaza_cadru, server_timing
+from services.image_cache import cache_decodare
 
 router = APIRouter()
 
+DECODE_BATCH_MAX = int(os.getenv("DECODE_BATCH_MAX", "32"))
+
 @router.post("/decode-barcode")
-async def decode_barcode(file: UploadFile = File(...)):
+async def decode_barcode(response: Response, file: UploadFile = File(...)):
+    start = time.perf_counter()
+    contents = await file.read()
+
     try:
-        
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
+        rezultat, sursa = await cache_decodare.get(contents, decodeaza)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Eroare la decodare: {str(e)}")
 
-        open_cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+    # La un hit din cache, timpii originali de decodare nu mai sunt relevanți
+    timpi = rezultat["timpi_ms"] if sursa == "calculat" else {"cache": 0}
+    timpi = {**timpi, "total": round((time.perf_counter() - start) * 1000, 2)}
+    response.headers["Server-Timing"] = server_timing(timpi)
 
-        barcodes = decode(open_cv_image)
+    if not rezultat["coduri"]:
+        raise HTTPException(
+            status_code=404,
+            detail="Niciun cod de bare detectat.",
+            headers={"Server-Timing": response.headers["Server-Timing"]},
+        )
 
-        if not barcodes:
-            raise HTTPException(status_code=404, detail="Niciun cod de bare detectat.")
+    return {"code": rezultat["coduri"][0]["data"]}
 
-        barcode_data = barcodes[0].data.decode("utf-8")
-        return {"code": barcode_data}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Eroare la decodare: {str(e)}")
+@router.post("/decode-barcode/batch")
+async def decode_barcode_batch(files: List[UploadFile] = File(...)):
+    if len(files) > DECODE_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Maxim {DECODE_BATCH_MAX} imagini per cerere")
+
+    continut = [await f.read() for f in files]
+    rezultate = await asyncio.gather(*(cache_decodare.get(c, decodeaza) for c in continut), return_exceptions=True)
+
+    imagini = []
+    for index, (f, rezultat) in enumerate(zip(files, rezultate)):
+        if isinstance(rezultat, Exception):
+            imagini.append({"index": index, "fisier": f.filename, "coduri": [], "eroare": str(rezultat)})
+        else:
+            imagini.append({"index": index, "fisier": f.filename, **rezultat[0]})
+
+    return {"imagini": imagini}
+
+
+@router.websocket("/ws/decode-barcode")
+async def decode_barcode_stream(websocket: WebSocket):
+    # Clientul trimite cadre (JPEG/PNG) ca mesaje binare. Procesăm mereu doar
+    # cel mai recent cadru, sărim peste cele aproape identice cu precedentul
+    # și trimitem fiecare cod nou imediat ce a fost decodat.
+    await websocket.accept()
+    ultimul = {"cadru": None, "index": -1}
+    cadru_nou = asyncio.Event()
+
+    async def citeste():
+        try:
+            while True:
+                mesaj = await websocket.receive()
+                if mesaj["type"] == "websocket.disconnect":
+                    break
+                if mesaj.get("bytes"):
+                    ultimul["cadru"] = mesaj["bytes"]
+                    ultimul["index"] += 1
+                    cadru_nou.set()
+        finally:
+            ultimul["cadru"] = None
+            cadru_nou.set()
+
+    cititor = asyncio.create_task(citeste())
+    amprenta = None
+    trimise = set()
+    try:
+        while True:
+            await cadru_nou.wait()
+            cadru_nou.clear()
+            cadru, index = ultimul["cadru"], ultimul["index"]
+            if cadru is None:
+                break
+
+            try:
+                rezultat = await decodeaza_cadru(cadru, amprenta)
+            except Exception as e:
+                await websocket.send_json({"eroare": str(e), "cadru": index})
+                continue
+
+            amprenta = rezultat["amprenta"]
+            for cod in rezultat["coduri"]:
+                if cod["data"] in trimise:
+                    continue
+                trimise.add(cod["data"])
+                await websocket.send_json({"code": cod["data"], "tip": cod["tip"], "pozitie": cod["pozitie"], "cadru": index})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        cititor.cancel()
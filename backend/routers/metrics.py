@@ -0,0 +1,77 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services import metrics, rezilienta
+from services.alternatives_index import alternatives_index
+from services.cache_partajat import cache_partajat
+from services.image_cache import cache_decodare, cache_scan
+from services.name_index import name_index
+from services.planificator import cota_gemini, planificatoare
+from services.product_cache import product_cache
+from services.recipes_service import cache_gemini
+from services.search_cache import search_cache
+from services.singleflight import zboruri
+from services.token_cache import token_cache
+
+router = APIRouter()
+
+
+@metrics.colector
+def _stari_servicii():
+    caches = {
+        "product": product_cache.stats(),
+        "search": search_cache.stats(),
+        "token": token_cache.stats(),
+        "gemini": cache_gemini.stats(),
+        "scan_image": cache_scan.stats(),
+        "decode_image": cache_decodare.stats(),
+    }
+    for nume, stats in caches.items():
+        yield "healthyscan_cache_entries", "Intrări în cache", {"cache": nume}, stats["size"]
+        yield "healthyscan_cache_hits_total", "Hit-uri de la pornire", {"cache": nume}, stats["hits"]
+        yield "healthyscan_cache_misses_total", "Miss-uri de la pornire", {"cache": nume}, stats["misses"]
+        yield "healthyscan_cache_hit_ratio", "Proporția de hit-uri de la pornire", {"cache": nume}, stats["hit_ratio"]
+    yield "healthyscan_product_cache_disk_hits_total", "Produse servite din SQLite", {}, caches["product"]["disk_hits"]
+    yield "healthyscan_search_cache_stale_served_total", "Rezultate expirate servite aproape de cotă", {}, caches["search"]["stale_served"]
+    for nume in ("scan_image", "decode_image"):
+        yield "healthyscan_image_cache_approximate_hits_total", "Imagini potrivite după dHash", {"cache": nume}, caches[nume]["approximate_hits"]
+    yield "healthyscan_cse_quota_used", "Apeluri Custom Search în ziua curentă", {}, caches["search"]["quota"]["folosite"]
+    if cache_partajat.activ:
+        partajat = cache_partajat.stats()
+        yield "healthyscan_shared_cache_hits_total", "Intrări găsite în cache-ul comun worker-ilor", {}, partajat["hits"]
+        yield "healthyscan_shared_cache_misses_total", "Căutări fără rezultat în cache-ul comun", {}, partajat["misses"]
+        yield "healthyscan_shared_cache_waits_total", "Apeluri amânate cât alt worker aducea aceeași cheie", {}, partajat["waits"]
+        yield "healthyscan_shared_cache_taken_over_total", "Rezultate preluate de la alt worker", {}, partajat["taken_over"]
+    yield "healthyscan_gemini_quota_used", "Apeluri Gemini în ziua curentă", {}, cota_gemini.stats()["folosite"]
+
+    for resursa, planificator in planificatoare.items():
+        stats = planificator.stats()
+        yield "healthyscan_scheduler_tokens", "Jetoane disponibile în planificator", {"resursa": resursa}, stats["jetoane"]
+        for prioritate, adancime in stats["coada"].items():
+            yield "healthyscan_scheduler_queue_depth", "Cereri care așteaptă un jeton", {"resursa": resursa, "prioritate": prioritate}, adancime
+
+    for nume, zbor in zboruri.items():
+        stats = zbor.stats()
+        yield "healthyscan_singleflight_calls_total", "Apeluri reale către upstream", {"zbor": nume}, stats["calls"]
+        yield "healthyscan_singleflight_deduplicated_total", "Apelanți care au așteptat un apel existent", {"zbor": nume}, stats["deduplicated"]
+        yield "healthyscan_singleflight_in_flight", "Chei cu apel în desfășurare", {"zbor": nume}, stats["in_flight"]
+
+    for host, upstream in rezilienta.upstreamuri.items():
+        stats = upstream.stats()
+        etichete = {"upstream": host}
+        yield "healthyscan_circuit_state", "Starea circuitului: 0 închis, 1 semideschis, 2 deschis", etichete, rezilienta.STARI[stats["stare"]]
+        yield "healthyscan_circuit_opened_total", "De câte ori s-a deschis circuitul", etichete, stats["deschideri"]
+        yield "healthyscan_circuit_rejected_total", "Apeluri refuzate cu circuitul deschis", etichete, stats["respinse"]
+        yield "healthyscan_upstream_hedges_total", "Cereri de rezervă trimise după p95", etichete, stats["hedges"]
+        yield "healthyscan_upstream_retries_total", "Reîncercări după eșec", etichete, stats["reincercari"]
+        yield "healthyscan_retry_budget_tokens", "Jetoane disponibile pentru hedging și reîncercări", etichete, stats["jetoane"]
+
+    for upstream, numar in metrics.upstream_in_zbor.items():
+        yield "healthyscan_upstream_in_flight", "Apeluri externe în desfășurare", {"upstream": upstream}, numar
+    yield "healthyscan_alternatives_index_products", "Produse în indexul de alternative", {}, len(alternatives_index)
+    yield "healthyscan_name_index_products", "Produse în indexul local de nume", {}, len(name_index)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
-from services.recipes_service import genereaza_reteta
+from services.planificator import PRIORITATE_RETETA, ResursaOcupata
+from services.recipes_service import genereaza_reteta, genereaza_text_stream, construieste_prompt, cheie_reteta
+from services.sse import eveniment, raspuns_sse
 
 router = APIRouter()
 
@@ -14,15 +16,42 @@ class RecipeRequest(BaseModel):
 
 @router.post("/reteta")
 async def get_recipe(data: RecipeRequest):
-    rezultat = genereaza_reteta(
-        cos=data.cos,
-        dieta=data.dieta,
-        scop=data.scop,
-        timp=data.timp,
-        context=data.context
-    )
+    try:
+        rezultat = await genereaza_reteta(
+            cos=data.cos,
+            dieta=data.dieta,
+            scop=data.scop,
+            timp=data.timp,
+            context=data.context
+        )
+    except ResursaOcupata as e:
+        # Cota Gemini e ocupată: clientul poate reîncerca după intervalul indicat
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(int(e.reincearca_dupa))}
+        )
 
     if rezultat.startswith("Eroare"):
         raise HTTPException(status_code=500, detail=rezultat)
 
     return {"reteta": rezultat}
+
+
+@router.post("/reteta/stream")
+async def get_recipe_stream(data: RecipeRequest):
+    # SSE: evenimente "data" cu {"text": ...} pe măsură ce sosesc, apoi "done" sau "error"
+    prompt = construieste_prompt(data.cos, data.dieta, data.scop, data.timp, data.context)
+    cheie = cheie_reteta(data.cos, data.dieta, data.scop, data.timp, data.context)
+
+    async def evenimente():
+        try:
+            async for bucata in genereaza_text_stream(prompt, cheie, PRIORITATE_RETETA):
+                yield eveniment({"text": bucata})
+        except ResursaOcupata as e:
+            yield eveniment({"detail": str(e), "retry_after": int(e.reincearca_dupa)}, "error")
+            return
+        except Exception as e:
+            yield eveniment({"detail": f"Eroare la generare: {str(e)}"}, "error")
+            return
+        yield eveniment({}, "done")
+
+    return raspuns_sse(evenimente())
@@ -1,16 +1,30 @@
-from fastapi import APIRouter, UploadFile, File, Body
-from services.ocr import extract_query_from_image
-from services.search import search_google_cse, grupeaza_rezultate_dupa_magazin
+import time
+from fastapi import APIRouter, UploadFile, File, Body, HTTPException
+from fastapi.responses import StreamingResponse
+from services.image_cache import cache_scan
+from services.search import (
+    MAGAZINE_DEADLINE,
+    cauta_pe_magazine_progresiv,
+    grupeaza_rezultate_dupa_magazin,
+    search_google_cse,
+)
+from services.serializare import serializeaza
 
 router = APIRouter()
 
 @router.post("/scan")
 async def scan_image(file: UploadFile = File(...)):
     contents = await file.read()
-    query = extract_query_from_image(contents)
+    query, _ = await cache_scan.get(contents, extrage_query)
     return {"query": query}
 
 
+async def extrage_query(contents: bytes) -> str:
+    from services.ocr import extract_query_from_image
+
+    return extract_query_from_image(contents)
+
+
 @router.post("/scan-and-search")
 async def scan_and_search(
     file: UploadFile = File(None),
@@ -18,13 +32,13 @@ async def scan_and_search(
 ):
     if file is not None:
         contents = await file.read()
-        query = extract_query_from_image(contents)
+        query, _ = await cache_scan.get(contents, extrage_query)
 
     if not query:
         return {"query": "invalid", "top3": [], "toate": [], "grupate": {}}
 
     print("🟡 QUERY:", query)
-    rezultate = search_google_cse(query)
+    rezultate = await search_google_cse(query)
     print("🟢 REZULTATE:", len(rezultate))
 
     grupate = grupeaza_rezultate_dupa_magazin(rezultate, query)
@@ -38,10 +52,66 @@ async def scan_and_search(
     }
 
 
+@router.post("/scan-and-search/stream")
+async def scan_and_search_stream(
+    file: UploadFile = File(None),
+    query: str = Body(default=None),
+    pe_magazine: bool = Body(default=False),
+):
+    """Ca /scan-and-search, dar NDJSON, trimis pe măsură ce datele sunt gata.
+
+    Linii: {"tip": "query"}, apoi câte un {"tip": "grup"} per magazin,
+    {"tip": "top3"} cu referințe (magazin, index) în loc de copii și {"tip": "gata"}.
+    Cu pe_magazine=true fiecare magazin este căutat separat și trimis când
+    răspunde, cu prețul a câte unui apel Custom Search per magazin.
+    """
+    contents = await file.read() if file is not None else None
+    start = time.perf_counter()
+
+    def linie(date: dict) -> bytes:
+        return serializeaza({**date, "ms": round((time.perf_counter() - start) * 1000, 1)}) + b"\n"
+
+    async def linii():
+        q = query
+        if contents is not None:
+            q, _ = await cache_scan.get(contents, extrage_query)
+        if not q:
+            yield linie({"tip": "query", "query": "invalid"})
+            yield linie({"tip": "gata", "total": 0})
+            return
+        yield linie({"tip": "query", "query": q})
+
+        top3 = []
+        total = 0
+
+        def grupuri(rezultate: list[dict]):
+            nonlocal total
+            for magazin, produse in grupeaza_rezultate_dupa_magazin(rezultate, q).items():
+                top3.extend({"magazin": magazin, "index": i} for i in range(min(len(produse), 3 - len(top3))))
+                total += len(produse)
+                yield linie({"tip": "grup", "magazin": magazin, "produse": produse})
+
+        if pe_magazine:
+            async for magazin, rezultat in cauta_pe_magazine_progresiv(q):
+                if rezultat["status"] != "ok":
+                    yield linie({"tip": "grup", "magazin": magazin.lower(), "status": rezultat["status"], "produse": []})
+                    continue
+                for bucata in grupuri(rezultat["rezultate"]):
+                    yield bucata
+        else:
+            for bucata in grupuri(await search_google_cse(q)):
+                yield bucata
+
+        yield linie({"tip": "top3", "ref": top3})
+        yield linie({"tip": "gata", "total": total})
+
+    return StreamingResponse(linii(), media_type="application/x-ndjson")
+
+
 @router.post("/search")
 async def direct_search(query: str = Body(..., embed=True)):
     print("🟡 QUERY direct:", query)
-    rezultate = search_google_cse(query)
+    rezultate = await search_google_cse(query)
     grupate = grupeaza_rezultate_dupa_magazin(rezultate, query)
     top3 = [item for group in grupate.values() for item in group][:3]
 
@@ -51,3 +121,25 @@ async def direct_search(query: str = Body(..., embed=True)):
         "toate": rezultate,
         "grupate": grupate
     }
+
+
+@router.post("/search-stores")
+async def search_stores(
+    query: str = Body(..., embed=True),
+    deadline: float = Body(default=MAGAZINE_DEADLINE, embed=True),
+):
+    query = query.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="Missing query")
+
+    start = time.perf_counter()
+    magazine = {}
+    async for magazin, rezultat in cauta_pe_magazine_progresiv(query, max(0.1, min(deadline, MAGAZINE_DEADLINE))):
+        magazine[magazin] = rezultat
+
+    return {
+        "query": query,
+        "partial": any(r["status"] != "ok" for r in magazine.values()),
+        "durata_ms": round((time.perf_counter() - start) * 1000, 1),
+        "magazine": magazine,
+    }
@@ -1,9 +1,10 @@
 import asyncio
-from database.models import Base
+from database.migrations import aplica_migrari, versiune_curenta
 from database.session import engine
 
 async def create_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    noi = await aplica_migrari(engine)
+    print(f"Migrări aplicate: {noi or 'niciuna'}; versiune curentă: {await versiune_curenta(engine)}")
+    await engine.dispose()
 
 asyncio.run(create_db())
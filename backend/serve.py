@@ -0,0 +1,106 @@
+"""Pornește backend-ul în producție, cu mai mulți worker-i pe aceeași mașină.
+
+    python serve.py                        # un worker per nucleu, port 8000
+    python serve.py --workers 4 --port 8080
+    kill -HUP <pid master>                 # repornește worker-ii pe rând, fără cereri pierdute
+
+Cu gunicorn instalat, aplicația este importată o singură dată în procesul
+master (preload) și worker-ii uvicorn o moștenesc prin fork; fără gunicorn
+(ex. Windows) se folosește supervizorul de procese al uvicorn. Worker-ii
+împart cache-ul de produse, căutări și imagini prin SHARED_CACHE_DB, iar
+cotele Custom Search și Gemini sunt numărate în comun.
+"""
+import argparse
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def aplica_migrari():
+    # Înainte de fork: schema e gata când pornesc worker-ii, iar pool-ul
+    # de conexiuni e golit ca niciun worker să nu moștenească o conexiune
+    from database.migrations import aplica_migrari, versiune_curenta
+    from database.session import engine
+
+    async def ruleaza():
+        noi = await aplica_migrari(engine)
+        print(f"Migrări aplicate: {noi or 'niciuna'}; versiune curentă: {await versiune_curenta(engine)}")
+        await engine.dispose()
+
+    asyncio.run(ruleaza())
+
+
+def porneste_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class Aplicatie(BaseApplication):
+        def load_config(self):
+            optiuni = {
+                "bind": f"{args.host}:{args.port}",
+                "workers": args.workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": not args.fara_preload,
+                "graceful_timeout": args.graceful_timeout,
+                "timeout": args.timeout,
+                "keepalive": 5,
+                # Worker-ii sunt reciclați periodic; jitter-ul îi oprește să repornească simultan
+                "max_requests": args.max_requests,
+                "max_requests_jitter": args.max_requests // 10,
+            }
+            for cheie, valoare in optiuni.items():
+                self.cfg.set(cheie, valoare)
+
+        def load(self):
+            from main import app
+
+            return app
+
+    Aplicatie().run()
+
+
+def porneste_uvicorn(args):
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="secunde pentru cererile în curs la oprire")
+    parser.add_argument("--timeout", type=int, default=60, help="secunde după care un worker blocat e repornit")
+    parser.add_argument("--max-requests", type=int, default=0, help="reciclează worker-ul după N cereri (0 = niciodată)")
+    parser.add_argument("--fara-preload", action="store_true", help="fiecare worker importă aplicația separat")
+    parser.add_argument("--fara-migrari", action="store_true")
+    args = parser.parse_args()
+
+    # Citite la importul modulelor din services/, deci înainte de preload și de fork
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    if args.workers > 1:
+        os.environ.setdefault("SHARED_CACHE_DB", "./shared_cache.db")
+
+    if not args.fara_migrari:
+        aplica_migrari()
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        porneste_uvicorn(args)
+    else:
+        porneste_gunicorn(args)
+
+
+if __name__ == "__main__":
+    main()
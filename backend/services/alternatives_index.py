@@ -0,0 +1,189 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left, insort
+
+from services.name_index import name_index
+from services.product_store import product_store
+
+# Index precalculat: slug categorie -> produse ordonate după NutriScore,
+# grupa NOVA și o penalizare pe nutrienți. Se construiește din depozitul
+# local și se completează incremental cu produsele aduse de la OpenFoodFacts.
+INDEX_MAX_PER_CATEGORIE = int(os.getenv("ALTERNATIVES_INDEX_MAX_PER_CATEGORY", "200"))
+INDEX_REFRESH_INTERVAL = float(os.getenv("ALTERNATIVES_INDEX_REFRESH_INTERVAL", "300"))
+# Cât timp considerăm completă o categorie descărcată de la OpenFoodFacts
+INDEX_CATEGORY_TTL = float(os.getenv("ALTERNATIVES_INDEX_CATEGORY_TTL", str(6 * 3600)))
+
+ORDINE_NUTRISCORE = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4}
+NUTRISCORE_ACCEPTAT = {"a", "b", "c"}
+
+
+def _valoare(nutrienti: dict, cheie: str) -> float:
+    try:
+        return float(nutrienti.get(f"{cheie}_100g") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def scor_produs(produs: dict) -> tuple:
+    nutrienti = produs.get("nutriments") or {}
+    penalizare = (
+        _valoare(nutrienti, "sugars")
+        + 2 * _valoare(nutrienti, "saturated-fat")
+        + 10 * _valoare(nutrienti, "salt")
+        - _valoare(nutrienti, "fiber")
+        - 0.5 * _valoare(nutrienti, "proteins")
+    )
+    nutriscore = ORDINE_NUTRISCORE.get(str(produs.get("nutriscore_grade", "")).lower(), 5)
+    try:
+        nova = int(produs.get("nova_group"))
+    except (TypeError, ValueError):
+        nova = 5
+    return (nutriscore, nova, round(penalizare, 2))
+
+
+def slug_categorie(tag: str) -> str:
+    return tag.split(":", 1)[-1]
+
+
+class AlternativesIndex:
+    def __init__(self):
+        self._categorii: dict[str, list[tuple]] = {}
+        self._produse: dict[str, tuple[tuple, list[str]]] = {}
+        self._rezumate: dict[str, dict] = {}
+        self._descarcate: dict[str, float] = {}
+        # Categorii acoperite de depozitul local (dump complet), nu doar produse văzute la /barcode
+        self._din_store: set[str] = set()
+        self._watermark = (0, "")
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._produse)
+
+    def _elimina(self, code: str):
+        vechi = self._produse.pop(code, None)
+        self._rezumate.pop(code, None)
+        if vechi is None:
+            return
+        cheie, slugs = vechi
+        for slug in slugs:
+            lista = self._categorii.get(slug)
+            if not lista:
+                continue
+            i = bisect_left(lista, (cheie, code))
+            if i < len(lista) and lista[i] == (cheie, code):
+                del lista[i]
+
+    def adauga(self, produs: dict):
+        # Toate produsele văzute trec pe aici, deci alimentăm și indexul de nume
+        name_index.adauga(produs)
+        code = str(produs.get("code") or "")
+        if not code:
+            return
+        self._elimina(code)
+
+        nume = (produs.get("product_name") or "").strip()
+        nutriscore = str(produs.get("nutriscore_grade", "")).lower()
+        if nutriscore not in NUTRISCORE_ACCEPTAT or len(nume) <= 3:
+            return
+
+        cheie = scor_produs(produs)
+        slugs = list(dict.fromkeys(slug_categorie(t) for t in produs.get("categories_tags") or []))
+        pastrate = []
+        for slug in slugs:
+            lista = self._categorii.setdefault(slug, [])
+            if len(lista) >= INDEX_MAX_PER_CATEGORIE and (cheie, code) > lista[-1]:
+                continue
+            insort(lista, (cheie, code))
+            pastrate.append(slug)
+            if len(lista) > INDEX_MAX_PER_CATEGORIE:
+                _, code_scos = lista.pop()
+                self._uita_categoria(code_scos, slug)
+        if not pastrate:
+            return
+
+        self._produse[code] = (cheie, pastrate)
+        self._rezumate[code] = {
+            "code": code,
+            "nume": nume,
+            "brand": (produs.get("brands") or "").split(",")[0].strip(),
+            "nutriscore": nutriscore.upper(),
+            "nova": cheie[1] if cheie[1] < 5 else None,
+            "penalizare": cheie[2],
+        }
+
+    def _uita_categoria(self, code: str, slug: str):
+        intrare = self._produse.get(code)
+        if intrare is None:
+            return
+        if slug in intrare[1]:
+            intrare[1].remove(slug)
+        if not intrare[1]:
+            self._produse.pop(code, None)
+            self._rezumate.pop(code, None)
+
+    def categorie_cunoscuta(self, slug: str) -> bool:
+        # Produsele indexate unul câte unul nu fac o categorie completă
+        if slug in self._din_store:
+            return True
+        descarcata = self._descarcate.get(slug)
+        return descarcata is not None and time.time() - descarcata < INDEX_CATEGORY_TTL
+
+    def adauga_categorie(self, slug: str, produse: list[dict]):
+        for produs in produse:
+            self.adauga(produs)
+        self._descarcate[slug] = time.time()
+
+    def cauta(self, slug: str, exclude_nume: str = "", limit: int = 3) -> list[dict]:
+        exclus = exclude_nume.strip().lower()
+        vazute = set()
+        rezultate = []
+        for _, code in self._categorii.get(slug, []):
+            rezumat = self._rezumate[code]
+            nume = rezumat["nume"].lower()
+            if nume == exclus or nume in vazute:
+                continue
+            vazute.add(nume)
+            rezultate.append(rezumat)
+            if len(rezultate) >= limit:
+                break
+        return rezultate
+
+    async def reimprospateaza_din_store(self) -> int:
+        adaugate = 0
+        while True:
+            lot = await asyncio.to_thread(product_store.lot_modificate, *self._watermark)
+            if not lot:
+                return adaugate
+            for produs in lot:
+                self.adauga(produs)
+                self._din_store.update(slug_categorie(t) for t in produs.get("categories_tags") or [])
+            adaugate += len(lot)
+            ultim = lot[-1]
+            self._watermark = (int(ultim.get("last_modified_t") or 0), ultim["code"])
+            # Cedăm controlul event loop-ului între loturi
+            await asyncio.sleep(0)
+
+    async def _bucla_reimprospatare(self):
+        while True:
+            try:
+                await self.reimprospateaza_din_store()
+            except Exception as e:
+                print("Eroare la reîmprospătarea indexului de alternative:", e)
+            await asyncio.sleep(INDEX_REFRESH_INTERVAL)
+
+    def porneste(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._bucla_reimprospatare())
+
+    async def opreste(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+alternatives_index = AlternativesIndex()
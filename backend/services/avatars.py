@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+import uuid
+
+from fastapi import UploadFile
+
+# Avatarele sunt salvate după hash-ul conținutului: același fișier încărcat de
+# mai mulți utilizatori ocupă o singură dată spațiu, iar URL-ul nu se mai schimbă,
+# deci poate fi pus în cache de client pentru totdeauna.
+MEDIA_DIR = os.getenv("MEDIA_DIR", "media")
+AVATAR_DIR = os.path.join(MEDIA_DIR, "avatars")
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(5 * 1024 * 1024)))
+AVATAR_THUMB_SIZES = [int(s) for s in os.getenv("AVATAR_THUMB_SIZES", "64,256").split(",") if s.strip()]
+AVATAR_CHUNK = 64 * 1024
+
+FORMATE = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+TIPURI_MEDIA = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif"}
+
+
+class EroareAvatar(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _pregateste_imagine(temp: str, digest: str) -> str:
+    # Rulează într-un fir separat: decodare, miniaturi și mutarea fișierului
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        image = Image.open(temp)
+        ext = FORMATE.get(image.format)
+        if ext is None:
+            raise EroareAvatar(415, "Format de imagine neacceptat")
+        image.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise EroareAvatar(400, "Fișierul nu este o imagine validă")
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        fundal = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        fundal.paste(rgba, mask=rgba.getchannel("A"))
+        image = fundal
+
+    for latura in AVATAR_THUMB_SIZES:
+        cale = os.path.join(AVATAR_DIR, f"{digest}_{latura}.jpg")
+        if os.path.exists(cale):
+            continue
+        miniatura = ImageOps.fit(image, (latura, latura), Image.LANCZOS)
+        temp_miniatura = f"{cale}.{uuid.uuid4().hex}.tmp"
+        miniatura.save(temp_miniatura, "JPEG", quality=85, optimize=True, progressive=True)
+        os.replace(temp_miniatura, cale)
+
+    final = os.path.join(AVATAR_DIR, f"{digest}.{ext}")
+    if os.path.exists(final):
+        os.remove(temp)
+    else:
+        os.replace(temp, final)
+    return ext
+
+
+def _sterge(cale: str):
+    try:
+        os.remove(cale)
+    except FileNotFoundError:
+        pass
+
+
+async def salveaza_avatar(file: UploadFile) -> dict:
+    """Copiază upload-ul pe disc pe bucăți, cu limită de mărime, și generează miniaturile.
+
+    Întoarce numele fișierelor relative la AVATAR_DIR: originalul și câte o
+    miniatură pătrată JPEG pentru fiecare latură din AVATAR_THUMB_SIZES.
+    """
+    await asyncio.to_thread(os.makedirs, AVATAR_DIR, exist_ok=True)
+    temp = os.path.join(AVATAR_DIR, f"upload-{uuid.uuid4().hex}.tmp")
+    sha = hashlib.sha256()
+    marime = 0
+    f = await asyncio.to_thread(open, temp, "wb")
+    try:
+        try:
+            while bucata := await file.read(AVATAR_CHUNK):
+                marime += len(bucata)
+                if marime > AVATAR_MAX_BYTES:
+                    raise EroareAvatar(413, f"Avatarul depășește {AVATAR_MAX_BYTES // 1024} KB")
+                sha.update(bucata)
+                await asyncio.to_thread(f.write, bucata)
+        finally:
+            await asyncio.to_thread(f.close)
+        if marime == 0:
+            raise EroareAvatar(400, "Fișier gol")
+
+        digest = sha.hexdigest()
+        ext = await asyncio.to_thread(_pregateste_imagine, temp, digest)
+    except BaseException:
+        await asyncio.to_thread(_sterge, temp)
+        raise
+
+    return {
+        "original": f"{digest}.{ext}",
+        "miniaturi": {latura: f"{digest}_{latura}.jpg" for latura in AVATAR_THUMB_SIZES},
+    }
+
+
+def cale_avatar(nume: str) -> str | None:
+    # Doar nume produse de noi: hash hex, opțional _latura, apoi extensia
+    baza, _, ext = nume.rpartition(".")
+    digest = baza.split("_")[0]
+    if ext not in TIPURI_MEDIA or len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        return None
+    if "_" in baza and not baza.split("_", 1)[1].isdigit():
+        return None
+    cale = os.path.join(AVATAR_DIR, nume)
+    return cale if os.path.isfile(cale) else None
@@ -0,0 +1,147 @@
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from services import metrics
+from services.cache_partajat import WORKERS
+
+# Decodarea imaginilor este CPU pur, deci rulează într-un pool de procese,
+# nu pe event loop. DECODE_WORKERS=0 folosește thread pool-ul implicit.
+# Cu mai mulți worker-i web (serve.py), nucleele se împart între pool-urile lor
+DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", str(max(1, (os.cpu_count() or 1) // WORKERS))))
+# Pozele de pe telefon sunt micșorate la această latură înainte de detecție
+DECODE_MAX_SIDE = int(os.getenv("DECODE_MAX_SIDE", "1280"))
+# Cadrele video care diferă cu cel mult atâția biți (din 64) sunt considerate duplicate
+DECODE_FRAME_DIFF = int(os.getenv("DECODE_FRAME_DIFF", "4"))
+
+_pool: Executor | None = None
+
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _detecteaza(image) -> list[dict]:
+    from pyzbar.pyzbar import decode
+
+    return [
+        {
+            "data": b.data.decode("utf-8", errors="replace"),
+            "tip": b.type,
+            "pozitie": {"x": b.rect.left, "y": b.rect.top, "latime": b.rect.width, "inaltime": b.rect.height},
+            "poligon": [[p.x, p.y] for p in b.polygon],
+        }
+        for b in decode(image)
+    ]
+
+
+def decodeaza_imagine(contents: bytes, max_side: int = DECODE_MAX_SIDE) -> dict:
+    from PIL import Image
+
+    timpi = {}
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(contents))
+    original = image.size
+    # Pentru JPEG, draft() decodează direct în gri și la o scară redusă
+    image.draft("L", (max_side, max_side))
+    image = image.convert("L")
+    timpi["decodare"] = _ms(start)
+
+    start = time.perf_counter()
+    if max(image.size) > max_side:
+        factor = max_side / max(image.size)
+        dimensiune = (max(1, round(image.size[0] * factor)), max(1, round(image.size[1] * factor)))
+        micsorata = image.resize(dimensiune, Image.Resampling.BILINEAR, reducing_gap=2.0)
+    else:
+        micsorata = image
+    scala = original[0] / micsorata.size[0]
+    timpi["redimensionare"] = _ms(start)
+
+    start = time.perf_counter()
+    coduri = _detecteaza(micsorata)
+    # Codurile mici se pot pierde la micșorare: reîncercăm la rezoluția decodată
+    if not coduri and micsorata is not image:
+        coduri = _detecteaza(image)
+        scala = original[0] / image.size[0]
+    timpi["detectie"] = _ms(start)
+
+    if scala != 1.0:
+        for cod in coduri:
+            cod["pozitie"] = {k: round(v * scala) for k, v in cod["pozitie"].items()}
+            cod["poligon"] = [[round(x * scala), round(y * scala)] for x, y in cod["poligon"]]
+
+    return {"coduri": coduri, "timpi_ms": timpi}
+
+
+def amprenta_cadru(contents: bytes) -> int:
+    # dHash pe 64 de biți: sensibil la conținut, nu la zgomotul de compresie
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(contents))
+    image.draft("L", (64, 64))
+    pixeli = list(image.convert("L").resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    amprenta = 0
+    for rand in range(8):
+        for col in range(8):
+            amprenta = (amprenta << 1) | (pixeli[rand * 9 + col] > pixeli[rand * 9 + col + 1])
+    return amprenta
+
+
+def distanta(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def proceseaza_cadru(contents: bytes, amprenta_anterioara: int | None, prag: int = DECODE_FRAME_DIFF) -> dict:
+    # Un singur drum până la worker: amprenta și, doar dacă e cazul, decodarea
+    amprenta = amprenta_cadru(contents)
+    if amprenta_anterioara is not None and distanta(amprenta, amprenta_anterioara) <= prag:
+        return {"amprenta": amprenta_anterioara, "duplicat": True, "coduri": []}
+    rezultat = decodeaza_imagine(contents)
+    return {"amprenta": amprenta, "duplicat": False, **rezultat}
+
+
+def get_pool() -> Executor | None:
+    global _pool
+    if _pool is None and DECODE_WORKERS > 0:
+        _pool = ProcessPoolExecutor(max_workers=DECODE_WORKERS)
+    return _pool
+
+
+def _cu_timp_cpu(fn, *args) -> tuple:
+    # Rulează în worker; thread_time e corect și pentru pool-ul de fire
+    start = time.thread_time()
+    rezultat = fn(*args)
+    return rezultat, time.thread_time() - start
+
+
+async def decodeaza(contents: bytes) -> dict:
+    loop = asyncio.get_running_loop()
+    rezultat, cpu = await loop.run_in_executor(get_pool(), _cu_timp_cpu, decodeaza_imagine, contents)
+    metrics.decodare_cpu.observa(cpu, tip="imagine")
+    rezultat["timpi_ms"]["cpu"] = round(cpu * 1000, 2)
+    return rezultat
+
+
+async def decodeaza_cadru(contents: bytes, amprenta_anterioara: int | None) -> dict:
+    loop = asyncio.get_running_loop()
+    rezultat, cpu = await loop.run_in_executor(get_pool(), _cu_timp_cpu, proceseaza_cadru, contents, amprenta_anterioara)
+    metrics.decodare_cpu.observa(cpu, tip="cadru")
+    return rezultat
+
+
+async def amprenta(contents: bytes) -> int:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), amprenta_cadru, contents)
+
+
+def server_timing(timpi_ms: dict) -> str:
+    return ", ".join(f"{etapa};dur={durata}" for etapa, durata in timpi_ms.items())
+
+
+def inchide_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+
+class Intrare(NamedTuple):
+    valoare: Any
+    salvat_la: float
+    expira_la: float
+    stale_pana_la: float
+
+    def proaspata(self, acum: float | None = None) -> bool:
+        return (acum or time.time()) < self.expira_la
+
+    def utilizabila(self, acum: float | None = None) -> bool:
+        return (acum or time.time()) < self.stale_pana_la
+
+
+class LRUCache:
+    """Cache în memorie cu evacuare LRU și TTL per intrare.
+
+    Intrările expirate pot fi încă servite până la `stale_pana_la`, ca
+    apelantul să poată răspunde imediat și să reîmprospăteze în fundal.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._date: OrderedDict[Any, Intrare] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._date)
+
+    def __contains__(self, key) -> bool:
+        return key in self._date
+
+    def get(self, key) -> Intrare | None:
+        intrare = self._date.get(key)
+        if intrare is None:
+            self.misses += 1
+            return None
+        if not intrare.utilizabila():
+            del self._date[key]
+            self.misses += 1
+            return None
+        self._date.move_to_end(key)
+        self.hits += 1
+        return intrare
+
+    def peek(self, key) -> Intrare | None:
+        # Fără statistici și fără mutare în ordinea LRU
+        intrare = self._date.get(key)
+        return intrare if intrare is not None and intrare.utilizabila() else None
+
+    def set(self, key, valoare, ttl: float, stale_ttl: float = 0, salvat_la: float | None = None) -> Intrare:
+        salvat_la = salvat_la or time.time()
+        intrare = Intrare(valoare, salvat_la, salvat_la + ttl, salvat_la + ttl + stale_ttl)
+        self._date[key] = intrare
+        self._date.move_to_end(key)
+        while len(self._date) > self.maxsize:
+            self._date.popitem(last=False)
+        return intrare
+
+    def pune(self, key, intrare: Intrare) -> Intrare:
+        # Intrare venită din alt nivel de cache, cu timpii ei originali
+        self._date[key] = intrare
+        self._date.move_to_end(key)
+        while len(self._date) > self.maxsize:
+            self._date.popitem(last=False)
+        return intrare
+
+    def pop(self, key):
+        intrare = self._date.pop(key, None)
+        return intrare.valoare if intrare else None
+
+    def clear(self):
+        self._date.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._date),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from services.cache import Intrare
+
+# Nivel de cache comun tuturor worker-ilor de pe aceeași mașină: un fișier
+# SQLite în mod WAL, citit direct de fiecare proces. Pe lângă intrări ține
+# revendicări (un singur worker apelează upstream-ul pentru o cheie, ceilalți
+# așteaptă rezultatul) și contoare zilnice pentru cotele API-urilor externe.
+# Cu SHARED_CACHE_DB gol (implicit pentru un singur proces) totul e no-op.
+SHARED_CACHE_DB = os.getenv("SHARED_CACHE_DB", "")
+# Cât timp o revendicare îi ține pe ceilalți worker-i în așteptare
+SHARED_CACHE_LEASE = float(os.getenv("SHARED_CACHE_LEASE", "10"))
+SHARED_CACHE_POLL = float(os.getenv("SHARED_CACHE_POLL", "0.05"))
+SHARED_CACHE_CLEANUP_EVERY = int(os.getenv("SHARED_CACHE_CLEANUP_EVERY", "1000"))
+# Numărul de procese care servesc aplicația; setat de serve.py
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+def _text(cheie: Hashable) -> str:
+    if isinstance(cheie, str):
+        return cheie
+    if isinstance(cheie, bytes):
+        return cheie.hex()
+    return json.dumps(cheie, ensure_ascii=False, default=str)
+
+
+class CachePartajat:
+    def __init__(self, path: str = SHARED_CACHE_DB):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.scrieri = 0
+        self.asteptari = 0
+        self.preluate = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def activ(self) -> bool:
+        return bool(self.path)
+
+    def _conexiune(self) -> sqlite3.Connection:
+        # Conexiunea se deschide abia în worker, nu în procesul care face preload
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS intrari ("
+                " spatiu TEXT NOT NULL,"
+                " cheie TEXT NOT NULL,"
+                " valoare TEXT,"
+                " salvat_la REAL NOT NULL,"
+                " expira_la REAL NOT NULL,"
+                " stale_pana_la REAL NOT NULL,"
+                " PRIMARY KEY (spatiu, cheie)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS revendicari ("
+                " spatiu TEXT NOT NULL,"
+                " cheie TEXT NOT NULL,"
+                " pana_la REAL NOT NULL,"
+                " PRIMARY KEY (spatiu, cheie)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS contoare ("
+                " nume TEXT NOT NULL,"
+                " zi TEXT NOT NULL,"
+                " valoare INTEGER NOT NULL,"
+                " PRIMARY KEY (nume, zi)) WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # --- intrări ---
+
+    def get(self, spatiu: str, cheie: Hashable, numara: bool = True) -> Intrare | None:
+        if not self.activ:
+            return None
+        with self._lock:
+            rand = self._conexiune().execute(
+                "SELECT valoare, salvat_la, expira_la, stale_pana_la FROM intrari"
+                " WHERE spatiu = ? AND cheie = ? AND stale_pana_la > ?",
+                (spatiu, _text(cheie), time.time()),
+            ).fetchone()
+        if rand is None:
+            self.misses += numara
+            return None
+        self.hits += numara
+        valoare, *timpi = rand
+        return Intrare(json.loads(valoare) if valoare is not None else None, *timpi)
+
+    def set(self, spatiu: str, cheie: Hashable, intrare: Intrare):
+        if not self.activ:
+            return
+        valoare = json.dumps(intrare.valoare, ensure_ascii=False) if intrare.valoare is not None else None
+        with self._lock:
+            conn = self._conexiune()
+            conn.execute(
+                "INSERT OR REPLACE INTO intrari VALUES (?, ?, ?, ?, ?, ?)",
+                (spatiu, _text(cheie), valoare, intrare.salvat_la, intrare.expira_la, intrare.stale_pana_la),
+            )
+            self.scrieri += 1
+            if self.scrieri % SHARED_CACHE_CLEANUP_EVERY == 0:
+                conn.execute("DELETE FROM intrari WHERE stale_pana_la < ?", (time.time(),))
+            conn.commit()
+
+    # --- revendicări ---
+
+    def revendica(self, spatiu: str, cheie: str, durata: float = SHARED_CACHE_LEASE) -> bool:
+        acum = time.time()
+        with self._lock:
+            conn = self._conexiune()
+            # O revendicare expirată (worker oprit în timpul apelului) poate fi preluată
+            conn.execute(
+                "DELETE FROM revendicari WHERE spatiu = ? AND cheie = ? AND pana_la < ?", (spatiu, cheie, acum)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO revendicari VALUES (?, ?, ?)", (spatiu, cheie, acum + durata)
+            )
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def revendicat(self, spatiu: str, cheie: str) -> bool:
+        with self._lock:
+            return self._conexiune().execute(
+                "SELECT 1 FROM revendicari WHERE spatiu = ? AND cheie = ? AND pana_la >= ?",
+                (spatiu, cheie, time.time()),
+            ).fetchone() is not None
+
+    def elibereaza(self, spatiu: str, cheie: str):
+        with self._lock:
+            conn = self._conexiune()
+            conn.execute("DELETE FROM revendicari WHERE spatiu = ? AND cheie = ?", (spatiu, cheie))
+            conn.commit()
+
+    async def o_singura_data(
+        self,
+        spatiu: str,
+        cheie: Hashable,
+        calculeaza: Callable[[], Awaitable[Any]],
+        gata: Callable[[], Awaitable[Intrare | None]],
+    ) -> Any:
+        """Rulează `calculeaza` într-un singur worker pentru aceeași cheie.
+
+        Ceilalți worker-i verifică periodic `gata()` (care citește rezultatul
+        salvat de `calculeaza`) până când acesta apare sau revendicarea dispare;
+        dacă worker-ul revendicator a eșuat, calculează singuri.
+        """
+        if not self.activ:
+            return await calculeaza()
+
+        cheie = _text(cheie)
+        if await asyncio.to_thread(self.revendica, spatiu, cheie):
+            try:
+                return await calculeaza()
+            finally:
+                await asyncio.to_thread(self.elibereaza, spatiu, cheie)
+
+        self.asteptari += 1
+        termen = time.monotonic() + SHARED_CACHE_LEASE
+        while time.monotonic() < termen:
+            await asyncio.sleep(SHARED_CACHE_POLL)
+            intrare = await gata()
+            if intrare is not None:
+                self.preluate += 1
+                return intrare.valoare
+            if not await asyncio.to_thread(self.revendicat, spatiu, cheie):
+                break
+        return await calculeaza()
+
+    # --- contoare zilnice ---
+
+    def incrementeaza(self, nume: str, zi: str, cu: int = 1) -> int:
+        # Adaugă `cu` la contorul zilei și întoarce totalul tuturor worker-ilor
+        with self._lock:
+            conn = self._conexiune()
+            conn.execute(
+                "INSERT INTO contoare VALUES (?, ?, ?)"
+                " ON CONFLICT (nume, zi) DO UPDATE SET valoare = valoare + excluded.valoare",
+                (nume, zi, cu),
+            )
+            conn.execute("DELETE FROM contoare WHERE nume = ? AND zi <> ?", (nume, zi))
+            conn.commit()
+            return conn.execute("SELECT valoare FROM contoare WHERE nume = ? AND zi = ?", (nume, zi)).fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "activ": self.activ,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "writes": self.scrieri,
+            "waits": self.asteptari,
+            "taken_over": self.preluate,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+cache_partajat = CachePartajat()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+import httpx
+
+from services import metrics, rezilienta
+
+# Un singur client HTTP pentru toată durata aplicației: conexiunile keep-alive
+# sunt refolosite între cereri, iar apelurile nu mai blochează event loop-ul.
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "500"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "100"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+
+# HTTP/2 doar dacă pachetul opțional `h2` este instalat
+try:
+    import h2  # noqa: F401
+    HTTP2 = os.getenv("HTTP2", "1") == "1"
+except ImportError:
+    HTTP2 = False
+
+USER_AGENT = "HealthyScan/1.0 (+https://github.com/AioaneiElena/HealthyScan)"
+
+_client: httpx.AsyncClient | None = None
+_semafoare_host: dict[str, asyncio.Semaphore] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2,
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+    return _client
+
+
+def _semafor_pentru(host: str) -> asyncio.Semaphore:
+    semafor = _semafoare_host.get(host)
+    if semafor is None:
+        semafor = asyncio.Semaphore(HTTP_MAX_PER_HOST)
+        _semafoare_host[host] = semafor
+    return semafor
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    host = httpx.URL(url).host
+
+    async def trimite() -> httpx.Response:
+        # Limităm numărul de cereri simultane către același host
+        async with _semafor_pentru(host):
+            with metrics.apel_upstream(host) as apel:
+                response = await get_client().get(url, **kwargs)
+                apel["status"] = response.status_code
+                return response
+
+    # Circuit breaker, hedging și reîncercări per host; vezi services/rezilienta
+    return await rezilienta.pentru(host).apel(trimite)
+
+
+def disponibil(url: str) -> bool:
+    # Fals cât timp circuitul host-ului este deschis
+    return rezilienta.pentru(httpx.URL(url).host).breaker.stare != rezilienta.DESCHIS
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _semafoare_host.clear()
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from services import barcode_decoder
+from services.cache import Intrare, LRUCache
+from services.cache_partajat import cache_partajat
+from services.singleflight import SingleFlight
+
+# Imagine încărcată -> rezultatul procesării ei (query OCR sau coduri decodate).
+# Reîncercările de upload și pozele refăcute la fel nu mai trec prin OCR/pyzbar;
+# valorile sunt mici, deci numărul de intrări limitează și memoria.
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "2000"))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", "3600"))
+# Potrivire aproximativă după dHash, pentru cadre aproape identice; implicit oprită
+IMAGE_CACHE_PHASH = os.getenv("IMAGE_CACHE_PHASH", "0") == "1"
+IMAGE_CACHE_PHASH_DIFF = int(os.getenv("IMAGE_CACHE_PHASH_DIFF", "2"))
+IMAGE_CACHE_PHASH_WINDOW = int(os.getenv("IMAGE_CACHE_PHASH_WINDOW", "512"))
+
+
+class ImageCache:
+    def __init__(self, nume: str, maxsize: int = IMAGE_CACHE_SIZE):
+        self.spatiu = f"imagine_{nume}"
+        self.memorie = LRUCache(maxsize)
+        self.aproximative = 0
+        self._amprente: OrderedDict[bytes, int] = OrderedDict()
+        # Reîncercările sosite cât prima cerere încă rulează o așteaptă pe aceasta
+        self._zbor = SingleFlight(self.spatiu)
+
+    async def get(self, contents: bytes, calculeaza: Callable[[bytes], Awaitable[Any]]) -> tuple[Any, str]:
+        """Întoarce (valoare, sursa), cu sursa "exact", "aproximativ" sau "calculat"."""
+        digest = hashlib.blake2b(contents, digest_size=16).digest()
+        intrare = self.memorie.get(digest)
+        if intrare is not None:
+            return intrare.valoare, "exact"
+        # Aceeași imagine procesată deja de alt worker
+        intrare = await self._din_partajat(digest)
+        if intrare is not None:
+            self.memorie.pune(digest, intrare)
+            return intrare.valoare, "exact"
+        return await self._zbor.do(
+            digest,
+            lambda: cache_partajat.o_singura_data(
+                self.spatiu,
+                digest,
+                lambda: self._calculeaza(digest, contents, calculeaza),
+                lambda: self._rezultat_partajat(digest),
+            ),
+        )
+
+    async def _din_partajat(self, digest: bytes, numara: bool = True):
+        if not cache_partajat.activ:
+            return None
+        return await asyncio.to_thread(cache_partajat.get, self.spatiu, digest, numara)
+
+    async def _rezultat_partajat(self, digest: bytes):
+        # Pentru worker-ii care așteaptă: rezultatul calculat de revendicator
+        intrare = await self._din_partajat(digest, False)
+        if intrare is None:
+            return None
+        self.memorie.pune(digest, intrare)
+        return Intrare((intrare.valoare, "exact"), *intrare[1:])
+
+    async def _calculeaza(self, digest: bytes, contents: bytes, calculeaza) -> tuple[Any, str]:
+        amprenta = None
+        if IMAGE_CACHE_PHASH:
+            try:
+                amprenta = await barcode_decoder.amprenta(contents)
+            except Exception:
+                # Imagine invalidă: lăsăm procesarea normală să raporteze eroarea
+                amprenta = None
+            vecin = self._vecin(amprenta) if amprenta is not None else None
+            if vecin is not None:
+                self.aproximative += 1
+                self.memorie.set(digest, vecin, IMAGE_CACHE_TTL)
+                return vecin, "aproximativ"
+
+        valoare = await calculeaza(contents)
+        intrare = self.memorie.set(digest, valoare, IMAGE_CACHE_TTL)
+        if cache_partajat.activ:
+            await asyncio.to_thread(cache_partajat.set, self.spatiu, digest, intrare)
+        if amprenta is not None:
+            self._amprente[digest] = amprenta
+            while len(self._amprente) > IMAGE_CACHE_PHASH_WINDOW:
+                self._amprente.popitem(last=False)
+        return valoare, "calculat"
+
+    def _vecin(self, amprenta: int) -> Any | None:
+        for digest, alta in reversed(self._amprente.items()):
+            if barcode_decoder.distanta(amprenta, alta) <= IMAGE_CACHE_PHASH_DIFF:
+                intrare = self.memorie.peek(digest)
+                if intrare is not None:
+                    return intrare.valoare
+        return None
+
+    def stats(self) -> dict:
+        return {**self.memorie.stats(), "approximate_hits": self.aproximative}
+
+
+cache_scan = ImageCache("scan")
+cache_decodare = ImageCache("decodare")
@@ -0,0 +1,177 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+# Metrici în format text Prometheus, fără dependențe externe. Contoarele și
+# histogramele sunt actualizate pe loc; valorile de tip gauge (cache-uri,
+# cereri în zbor) sunt citite din statisticile serviciilor la fiecare scrape.
+BUCKETS_LATENTA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_metrici: list["_Metrica"] = []
+_colectoare: list[Callable[[], Iterable[tuple[str, str, dict, float]]]] = []
+
+
+def _escape(valoare) -> str:
+    return str(valoare).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_etichete(etichete: dict) -> str:
+    if not etichete:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in etichete.items()) + "}"
+
+
+def _format_numar(valoare: float) -> str:
+    if valoare == float("inf"):
+        return "+Inf"
+    return repr(float(valoare)) if isinstance(valoare, float) else str(valoare)
+
+
+class _Metrica:
+    tip = ""
+
+    def __init__(self, nume: str, descriere: str, etichete: tuple[str, ...] = ()):
+        self.nume = nume
+        self.descriere = descriere
+        self.etichete = etichete
+        self._lock = threading.Lock()
+        _metrici.append(self)
+
+    def _cheie(self, etichete: dict) -> tuple:
+        return tuple(str(etichete.get(e, "")) for e in self.etichete)
+
+    def _antet(self) -> list[str]:
+        return [f"# HELP {self.nume} {self.descriere}", f"# TYPE {self.nume} {self.tip}"]
+
+
+class Contor(_Metrica):
+    tip = "counter"
+
+    def __init__(self, nume: str, descriere: str, etichete: tuple[str, ...] = ()):
+        super().__init__(nume, descriere, etichete)
+        self._valori: dict[tuple, float] = {}
+
+    def inc(self, valoare: float = 1, **etichete):
+        cheie = self._cheie(etichete)
+        with self._lock:
+            self._valori[cheie] = self._valori.get(cheie, 0) + valoare
+
+    def render(self) -> list[str]:
+        linii = self._antet()
+        with self._lock:
+            for cheie, valoare in self._valori.items():
+                linii.append(f"{self.nume}{_format_etichete(dict(zip(self.etichete, cheie)))} {_format_numar(valoare)}")
+        return linii
+
+
+class Histograma(_Metrica):
+    tip = "histogram"
+
+    def __init__(self, nume: str, descriere: str, etichete: tuple[str, ...] = (), buckets: tuple = BUCKETS_LATENTA):
+        super().__init__(nume, descriere, etichete)
+        self.buckets = tuple(buckets)
+        self._valori: dict[tuple, list] = {}
+
+    def observa(self, valoare: float, **etichete):
+        cheie = self._cheie(etichete)
+        with self._lock:
+            seria = self._valori.get(cheie)
+            if seria is None:
+                # numărători pe bucket (neacumulați), suma, numărul total
+                seria = self._valori[cheie] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, valoare)
+            if index < len(self.buckets):
+                seria[0][index] += 1
+            seria[1] += valoare
+            seria[2] += 1
+
+    def render(self) -> list[str]:
+        linii = self._antet()
+        with self._lock:
+            for cheie, (numaratori, suma, total) in self._valori.items():
+                etichete = dict(zip(self.etichete, cheie))
+                cumulat = 0
+                for limita, numar in zip(self.buckets, numaratori):
+                    cumulat += numar
+                    linii.append(f"{self.nume}_bucket{_format_etichete({**etichete, 'le': _format_numar(limita)})} {cumulat}")
+                linii.append(f"{self.nume}_bucket{_format_etichete({**etichete, 'le': '+Inf'})} {total}")
+                linii.append(f"{self.nume}_sum{_format_etichete(etichete)} {_format_numar(suma)}")
+                linii.append(f"{self.nume}_count{_format_etichete(etichete)} {total}")
+        return linii
+
+
+def colector(fn: Callable[[], Iterable[tuple[str, str, dict, float]]]):
+    """Înregistrează o funcție care produce (nume, descriere, etichete, valoare) la scrape.
+
+    Valorile cu nume terminat în `_total` sunt exportate ca counter (trebuie
+    doar să crească de la pornire), restul ca gauge.
+    """
+    _colectoare.append(fn)
+    return fn
+
+
+def render() -> str:
+    linii = []
+    for metrica in _metrici:
+        linii.extend(metrica.render())
+
+    # Seriile cu același nume trebuie grupate sub un singur antet
+    colectate: dict[str, tuple[str, list[str]]] = {}
+    for fn in _colectoare:
+        for nume, descriere, etichete, valoare in fn():
+            colectate.setdefault(nume, (descriere, []))[1].append(
+                f"{nume}{_format_etichete(etichete)} {_format_numar(valoare)}"
+            )
+    for nume, (descriere, valori) in colectate.items():
+        tip = "counter" if nume.endswith("_total") else "gauge"
+        linii += [f"# HELP {nume} {descriere}", f"# TYPE {nume} {tip}", *valori]
+    return "\n".join(linii) + "\n"
+
+
+cereri_http = Histograma(
+    "healthyscan_http_request_duration_seconds",
+    "Durata cererilor HTTP până la trimiterea antetelor, pe rută",
+    ("metoda", "ruta", "status"),
+)
+upstream_durata = Histograma(
+    "healthyscan_upstream_request_duration_seconds",
+    "Durata apelurilor către servicii externe",
+    ("upstream",),
+)
+upstream_cereri = Contor(
+    "healthyscan_upstream_requests_total",
+    "Apeluri către servicii externe, după status HTTP sau tipul erorii",
+    ("upstream", "status"),
+)
+decodare_cpu = Histograma(
+    "healthyscan_decode_cpu_seconds",
+    "Timp CPU consumat de worker pentru decodarea unei imagini",
+    ("tip",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# Apeluri către upstream aflate în desfășurare, după nume
+upstream_in_zbor: dict[str, int] = {}
+
+
+@contextmanager
+def apel_upstream(upstream: str):
+    """Măsoară un apel extern: durată, status și numărul de apeluri în zbor.
+
+    Apelantul poate pune statusul HTTP în dicționarul primit; o excepție este
+    înregistrată cu numele clasei ei.
+    """
+    rezultat = {"status": "ok"}
+    upstream_in_zbor[upstream] = upstream_in_zbor.get(upstream, 0) + 1
+    start = time.perf_counter()
+    try:
+        yield rezultat
+    except BaseException as e:
+        rezultat["status"] = type(e).__name__
+        raise
+    finally:
+        upstream_in_zbor[upstream] -= 1
+        upstream_durata.observa(time.perf_counter() - start, upstream=upstream)
+        upstream_cereri.inc(upstream=upstream, status=rezultat["status"])
@@ -0,0 +1,98 @@
+import os
+import unicodedata
+from collections import OrderedDict
+
+# Index local nume produs -> categorii, pe trigrame, ca /alternatives și
+# /alternatives-ai să nu mai apeleze cgi/search.pl doar pentru a afla
+# categoriile unui nume. Se populează din aceleași produse ca indexul de
+# alternative: depozitul local importat și răspunsurile OpenFoodFacts.
+NAME_INDEX_MAX = int(os.getenv("NAME_INDEX_MAX", "200000"))
+# Scorul minim (0-1) pentru a accepta potrivirea locală; vezi NameIndex.cauta
+NAME_INDEX_MIN_SCORE = float(os.getenv("NAME_INDEX_MIN_SCORE", "0.6"))
+# Câți candidați scorăm complet, adunați din trigramele cele mai rare
+NAME_INDEX_CANDIDATI = 500
+
+
+def normalizeaza_nume(text: str) -> str:
+    # Fără diacritice (ă, â, î, ș/ş, ț/ţ), litere mici, doar litere și cifre
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def trigrame(text: str) -> set[str]:
+    trig = set()
+    for cuvant in text.split():
+        cuvant = f"  {cuvant} "
+        trig.update(cuvant[i:i + 3] for i in range(len(cuvant) - 2))
+    return trig
+
+
+class NameIndex:
+    def __init__(self, maxsize: int = NAME_INDEX_MAX):
+        self.maxsize = maxsize
+        self._produse: OrderedDict[str, tuple[frozenset, dict]] = OrderedDict()
+        self._postari: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._produse)
+
+    def _elimina(self, code: str):
+        vechi = self._produse.pop(code, None)
+        if vechi is None:
+            return
+        for t in vechi[0]:
+            postare = self._postari.get(t)
+            if postare is not None:
+                postare.discard(code)
+                if not postare:
+                    del self._postari[t]
+
+    def adauga(self, produs: dict):
+        code = str(produs.get("code") or "")
+        nume = (produs.get("product_name") or "").strip()
+        categorii = produs.get("categories_tags") or []
+        if not code or len(nume) < 3 or not categorii:
+            return
+        self._elimina(code)
+
+        brand = (produs.get("brands") or "").split(",")[0].strip()
+        trig = frozenset(trigrame(normalizeaza_nume(f"{nume} {brand}")))
+        self._produse[code] = (trig, {"code": code, "product_name": nume, "brands": brand, "categories_tags": list(categorii)})
+        for t in trig:
+            self._postari.setdefault(t, set()).add(code)
+        while len(self._produse) > self.maxsize:
+            self._elimina(next(iter(self._produse)))
+
+    def cauta(self, nume: str, min_score: float = NAME_INDEX_MIN_SCORE) -> dict | None:
+        """Cel mai apropiat produs după nume, sau None sub pragul de similaritate.
+
+        Scorul este media dintre acoperirea trigramelor din query și similaritatea
+        Dice, deci un nume scurt („cola") se potrivește cu produse mai lunge, dar
+        la egalitate câștigă cel mai apropiat ca lungime.
+        """
+        trig = trigrame(normalizeaza_nume(nume))
+        if not trig:
+            return None
+
+        # Candidații vin din trigramele rare; cele comune (ex. " la") nu aduc informație
+        postari = sorted((self._postari[t] for t in trig if t in self._postari), key=len)
+        candidati = set()
+        for postare in postari:
+            if candidati and len(candidati) + len(postare) > NAME_INDEX_CANDIDATI:
+                break
+            candidati |= postare
+
+        cel_mai_bun, scor_maxim = None, 0.0
+        for code in candidati:
+            trig_produs, rezumat = self._produse[code]
+            comune = len(trig & trig_produs)
+            scor = (comune / len(trig) + 2 * comune / (len(trig) + len(trig_produs))) / 2
+            if scor > scor_maxim:
+                cel_mai_bun, scor_maxim = rezumat, scor
+        if cel_mai_bun is None or scor_maxim < min_score:
+            return None
+        return {**cel_mai_bun, "scor": round(scor_maxim, 3)}
+
+
+name_index = NameIndex()
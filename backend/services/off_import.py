@@ -0,0 +1,157 @@
+"""Import din exporturile OpenFoodFacts în depozitul local de produse.
+
+Citește fișierul linie cu linie (JSONL sau CSV, opțional .gz), păstrează
+doar câmpurile folosite de /barcode și scrie în loturi, deci memoria
+rămâne constantă indiferent de mărimea dump-ului. Produsele care nu s-au
+schimbat (același `last_modified_t`) sunt sărite, așa că exporturile
+delta zilnice pot fi aplicate peste un import complet.
+
+    python -m services.off_import openfoodfacts-products.jsonl.gz
+    python -m services.off_import fixtures/off_sample.csv --format csv
+"""
+import argparse
+import csv
+import gzip
+import json
+import sys
+import time
+
+from services.product_store import CAMPURI_PRODUS, ProductStore, product_store
+
+BATCH = 1000
+
+CAMPURI_LISTA = {"categories_tags", "labels_tags", "allergens_tags", "additives_tags"}
+
+# Denumiri alternative din exporturile mai noi sau din CSV
+ALIASURI = {
+    "environmental_score_grade": "ecoscore_grade",
+    "allergens": "allergens_tags",
+}
+
+
+def deschide(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _numar(valoare: str):
+    try:
+        numar = float(valoare)
+    except ValueError:
+        return valoare
+    return int(numar) if numar.is_integer() else numar
+
+
+def _timestamp(valoare) -> int:
+    # Un last_modified_t invalid nu oprește importul: produsul e tratat ca foarte vechi
+    try:
+        return int(float(valoare or 0))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def proiecteaza(produs: dict) -> dict | None:
+    code = str(produs.get("code") or "").strip()
+    if not code:
+        return None
+
+    for alias, camp in ALIASURI.items():
+        if camp not in produs and alias in produs:
+            produs[camp] = produs[alias]
+
+    rezultat = {c: produs[c] for c in CAMPURI_PRODUS if produs.get(c) is not None}
+    rezultat["code"] = code
+    if "last_modified_t" in rezultat:
+        rezultat["last_modified_t"] = _timestamp(rezultat["last_modified_t"])
+    rezultat["nutriments"] = {
+        k: v for k, v in (produs.get("nutriments") or {}).items()
+        if not k.endswith("_unit")
+    }
+    return rezultat
+
+
+def citeste_jsonl(fisier):
+    for linie in fisier:
+        linie = linie.strip()
+        if not linie:
+            continue
+        try:
+            yield json.loads(linie)
+        except json.JSONDecodeError:
+            continue
+
+
+def citeste_csv(fisier):
+    csv.field_size_limit(sys.maxsize)
+    for rand in csv.DictReader(fisier, delimiter="\t"):
+        produs = {}
+        nutriments = {}
+        for cheie, valoare in rand.items():
+            if not cheie or valoare in (None, ""):
+                continue
+            if cheie.endswith("_100g") or cheie.endswith("_serving"):
+                nutriments[cheie] = _numar(valoare)
+            elif cheie in CAMPURI_LISTA or ALIASURI.get(cheie) in CAMPURI_LISTA:
+                produs[cheie] = [t for t in valoare.split(",") if t]
+            else:
+                produs[cheie] = valoare
+        if "nova_group" in produs:
+            produs["nova_group"] = _numar(produs["nova_group"])
+        produs["last_modified_t"] = _timestamp(produs.get("last_modified_t"))
+        produs["nutriments"] = nutriments
+        yield produs
+
+
+def _scrie_lot(store: ProductStore, lot: dict[str, dict], fortat: bool, stats: dict):
+    if not fortat:
+        versiuni = store.versiuni(list(lot))
+        for code in list(lot):
+            vechi = versiuni.get(code)
+            if vechi is not None and vechi >= _timestamp(lot[code].get("last_modified_t")):
+                del lot[code]
+                stats["neschimbate"] += 1
+    if lot:
+        store.scrie(list(lot.values()))
+        stats["scrise"] += len(lot)
+    lot.clear()
+
+
+def importa(path: str, format: str = "jsonl", store: ProductStore = product_store, fortat: bool = False) -> dict:
+    start = time.perf_counter()
+    stats = {"citite": 0, "scrise": 0, "neschimbate": 0, "invalide": 0}
+    cititor = citeste_csv if format == "csv" else citeste_jsonl
+    lot: dict[str, dict] = {}
+
+    with deschide(path) as fisier:
+        for brut in cititor(fisier):
+            stats["citite"] += 1
+            produs = proiecteaza(brut)
+            if produs is None:
+                stats["invalide"] += 1
+                continue
+            lot[produs["code"]] = produs
+            if len(lot) >= BATCH:
+                _scrie_lot(store, lot, fortat, stats)
+
+    _scrie_lot(store, lot, fortat, stats)
+    store.set_meta("ultimul_import", json.dumps({"fisier": path, "la": int(time.time()), **stats}))
+    stats["durata_s"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import dump OpenFoodFacts în depozitul local")
+    parser.add_argument("path", help="fișier .jsonl / .csv (opțional .gz)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None)
+    parser.add_argument("--db", default=None, help="fișierul SQLite destinație")
+    parser.add_argument("--force", action="store_true", help="rescrie și produsele neschimbate")
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if ".csv" in args.path else "jsonl")
+    store = ProductStore(args.db) if args.db else product_store
+    print(importa(args.path, format, store, args.force))
+
+
+if __name__ == "__main__":
+    main()
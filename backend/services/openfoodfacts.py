@@ -0,0 +1,189 @@
+import asyncio
+import os
+
+import httpx
+
+from services import http_client
+from services.alternatives_index import alternatives_index
+from services.name_index import name_index
+from services.product_cache import product_cache
+from services.product_store import CAMPURI_PRODUS, product_store
+from services.singleflight import SingleFlight
+
+OFF_BASE_URL = os.getenv("OFF_BASE_URL", "https://world.openfoodfacts.org")
+# Cu OFF_OFFLINE=1 răspundem doar din depozitul local importat
+OFF_OFFLINE = os.getenv("OFF_OFFLINE", "0") == "1"
+# Câte coduri cerem într-un singur apel /api/v2/search
+OFF_BATCH_SIZE = int(os.getenv("OFF_BATCH_SIZE", "50"))
+
+
+CAMPURI_CATEGORIE = [
+    "code",
+    "product_name",
+    "brands",
+    "nutriscore_grade",
+    "nova_group",
+    "categories_tags",
+    "nutriments",
+    "last_modified_t",
+]
+
+
+class EroareOpenFoodFacts(Exception):
+    pass
+
+
+zbor_produse = SingleFlight("openfoodfacts_product")
+
+
+async def descarca_produs(code: str) -> dict | None:
+    url = f"{OFF_BASE_URL}/api/v2/product/{code}.json"
+    try:
+        response = await http_client.get(url, params={"fields": ",".join(CAMPURI_PRODUS)})
+    except httpx.HTTPError as e:
+        raise EroareOpenFoodFacts(str(e)) from e
+
+    # OpenFoodFacts răspunde cu 404 și status 0 pentru coduri necunoscute
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise EroareOpenFoodFacts(f"HTTP {response.status_code}")
+
+    data = response.json()
+    if data.get("status") != 1:
+        return None
+    produs = data["product"]
+    alternatives_index.adauga(produs)
+    return produs
+
+
+async def descarca_produse(coduri: list[str]) -> dict[str, dict]:
+    url = f"{OFF_BASE_URL}/api/v2/search"
+    params = {"code": ",".join(coduri), "fields": ",".join(CAMPURI_PRODUS), "page_size": len(coduri)}
+    try:
+        response = await http_client.get(url, params=params)
+    except httpx.HTTPError as e:
+        raise EroareOpenFoodFacts(str(e)) from e
+    if response.status_code != 200:
+        raise EroareOpenFoodFacts(f"HTTP {response.status_code}")
+
+    try:
+        gasite = response.json().get("products", [])
+    except ValueError as e:
+        # OFF răspunde uneori cu o pagină HTML de eroare și status 200
+        raise EroareOpenFoodFacts(f"Răspuns invalid: {e}") from e
+
+    produse = {}
+    for produs in gasite:
+        if produs.get("code"):
+            produse[str(produs["code"])] = produs
+            alternatives_index.adauga(produs)
+    return produse
+
+
+async def cauta_produse(termeni: str, page_size: int = 1) -> list[dict]:
+    url = f"{OFF_BASE_URL}/cgi/search.pl"
+    params = {"search_terms": termeni, "json": 1, "page_size": page_size}
+    try:
+        response = await http_client.get(url, params=params)
+    except httpx.HTTPError as e:
+        raise EroareOpenFoodFacts(str(e)) from e
+    if response.status_code != 200:
+        raise EroareOpenFoodFacts(f"HTTP {response.status_code}")
+    produse = response.json().get("products", [])
+    for produs in produse:
+        name_index.adauga(produs)
+    return produse
+
+
+async def rezolva_nume(termeni: str) -> dict | None:
+    # Întâi indexul local de nume; cgi/search.pl doar dacă nu există o potrivire bună
+    produs = name_index.cauta(termeni)
+    if produs is not None:
+        return produs
+    rezultate = await cauta_produse(termeni)
+    return rezultate[0] if rezultate else None
+
+
+async def descarca_categorie(slug: str, page_size: int = 100) -> list[dict]:
+    url = f"{OFF_BASE_URL}/category/{slug}.json"
+    params = {"fields": ",".join(CAMPURI_CATEGORIE), "page_size": page_size}
+    try:
+        response = await http_client.get(url, params=params)
+    except httpx.HTTPError as e:
+        raise EroareOpenFoodFacts(str(e)) from e
+    if response.status_code != 200:
+        raise EroareOpenFoodFacts(f"HTTP {response.status_code}")
+    return response.json().get("products", [])
+
+
+async def get_product(code: str) -> dict | None:
+    produs = product_store.get(code)
+    if produs is not None or OFF_OFFLINE:
+        return produs
+    return await product_cache.get(code, _descarca_produs_coalescat)
+
+
+async def _descarca_produs_coalescat(code: str) -> dict | None:
+    return await zbor_produse.do(code, lambda: descarca_produs(code))
+
+
+async def get_products(coduri: list[str]):
+    """Produce (code, produs, eroare) pe măsură ce fiecare cod este rezolvat.
+
+    Codurile din depozitul local sau din cache vin imediat; restul sunt cerute
+    în loturi de OFF_BATCH_SIZE prin /api/v2/search, iar codurile lipsă din
+    răspuns trec prin lookup-ul individual (care face și cache negativ).
+    """
+    lipsa = []
+    for code in coduri:
+        produs = product_store.get(code)
+        if produs is not None:
+            yield code, produs, None
+            continue
+        intrare = await product_cache.cauta(code, _descarca_produs_coalescat)
+        if intrare is not None:
+            yield code, intrare.valoare, None
+        elif OFF_OFFLINE:
+            yield code, None, None
+        else:
+            lipsa.append(code)
+
+    if not lipsa:
+        return
+
+    coada: asyncio.Queue = asyncio.Queue()
+
+    async def individual(code: str):
+        try:
+            coada.put_nowait((code, await get_product(code), None))
+        except Exception as e:
+            coada.put_nowait((code, None, str(e)))
+
+    async def lot(coduri_lot: list[str]):
+        # Orice eșec al lotului trimite codurile la lookup-ul individual; altfel
+        # generatorul ar aștepta la nesfârșit coduri care nu mai sosesc
+        try:
+            produse = await descarca_produse(coduri_lot)
+        except Exception as e:
+            print("Eroare la lotul OpenFoodFacts:", e)
+            produse = {}
+        gasite = [c for c in coduri_lot if c in produse]
+        for code in gasite:
+            coada.put_nowait((code, produse[code], None))
+        await asyncio.gather(
+            *(individual(c) for c in coduri_lot if c not in produse),
+            *(product_cache.put(c, produse[c]) for c in gasite),
+            return_exceptions=True,
+        )
+
+    sarcini = [
+        asyncio.create_task(lot(lipsa[i:i + OFF_BATCH_SIZE]))
+        for i in range(0, len(lipsa), OFF_BATCH_SIZE)
+    ]
+    try:
+        for _ in range(len(lipsa)):
+            yield await coada.get()
+    finally:
+        for sarcina in sarcini:
+            sarcina.cancel()
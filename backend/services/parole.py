@@ -0,0 +1,38 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.hash import bcrypt
+
+# bcrypt este CPU pur (100-300 ms per apel), deci rulează într-un pool mic de
+# fire, nu pe event loop. Biblioteca bcrypt eliberează GIL-ul cât calculează.
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "4"))
+# Costul pentru parolele noi; hash-urile existente se verifică cu costul lor
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+_hasher = bcrypt.using(rounds=BCRYPT_ROUNDS)
+_pool: ThreadPoolExecutor | None = None
+
+
+def get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+    return _pool
+
+
+async def hash_parola(parola: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), _hasher.hash, parola)
+
+
+async def verifica_parola(parola: str, hash_salvat: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), bcrypt.verify, parola, hash_salvat)
+
+
+def inchide_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
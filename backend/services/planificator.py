@@ -0,0 +1,149 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+
+from services import metrics
+from services.cache_partajat import WORKERS
+from services.search_cache import CotaZilnica, search_cache
+
+# Planificator central pentru API-urile cu cotă (Custom Search, Gemini): un
+# token bucket per resursă, cu o coadă pe priorități. Cererile interactive
+# trec înaintea rețetelor, iar rețetele înaintea preîncărcărilor. Când
+# așteptarea estimată depășește limita clasei, cererea este refuzată imediat
+# cu ResursaOcupata, iar apelantul trece pe cache sau pe un răspuns degradat.
+PRIORITATE_INTERACTIV = 0
+PRIORITATE_RETETA = 1
+PRIORITATE_PREFETCH = 2
+NUME_PRIORITATI = {PRIORITATE_INTERACTIV: "interactiv", PRIORITATE_RETETA: "reteta", PRIORITATE_PREFETCH: "prefetch"}
+
+# Cât poate aștepta fiecare clasă un jeton înainte să fie refuzată
+ASTEPTARE_MAXIMA = {
+    PRIORITATE_INTERACTIV: float(os.getenv("SCHED_WAIT_INTERACTIVE", "3")),
+    PRIORITATE_RETETA: float(os.getenv("SCHED_WAIT_RECIPE", "15")),
+    PRIORITATE_PREFETCH: float(os.getenv("SCHED_WAIT_PREFETCH", "0")),
+}
+SCHED_MAX_QUEUE = int(os.getenv("SCHED_MAX_QUEUE", "200"))
+
+CSE_RATE_PER_MINUTE = float(os.getenv("CSE_RATE_PER_MINUTE", "100"))
+GEMINI_RATE_PER_MINUTE = float(os.getenv("GEMINI_RATE_PER_MINUTE", "15"))
+GEMINI_DAILY_QUOTA = int(os.getenv("GEMINI_DAILY_QUOTA", "1500"))
+# Fiecare worker are propriul bucket, deci primește o parte egală din rată;
+# cotele zilnice sunt numărate în comun prin cache-ul partajat.
+
+asteptare = metrics.Histograma(
+    "healthyscan_scheduler_wait_seconds",
+    "Timpul petrecut în coada planificatorului până la primirea unui jeton",
+    ("resursa", "prioritate"),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+refuzate = metrics.Contor(
+    "healthyscan_scheduler_shed_total",
+    "Cereri refuzate de planificator, după motiv",
+    ("resursa", "prioritate", "motiv"),
+)
+
+
+class ResursaOcupata(Exception):
+    def __init__(self, resursa: str, reincearca_dupa: float):
+        super().__init__(f"{resursa} este ocupat; reîncearcă peste {reincearca_dupa:.0f} s")
+        self.resursa = resursa
+        self.reincearca_dupa = reincearca_dupa
+
+
+class Planificator:
+    def __init__(self, nume: str, pe_minut: float, cota: CotaZilnica | None = None, rafala: float | None = None):
+        self.nume = nume
+        self.rata = pe_minut / 60 / WORKERS
+        self.capacitate = rafala or max(1.0, pe_minut / 10 / WORKERS)
+        self.cota = cota
+        self.jetoane = self.capacitate
+        self._actualizat = time.monotonic()
+        self._coada: list[tuple[int, int, asyncio.Future]] = []
+        self._secventa = itertools.count()
+        self._programat: asyncio.TimerHandle | None = None
+
+    def _reumple(self):
+        acum = time.monotonic()
+        self.jetoane = min(self.capacitate, self.jetoane + (acum - self._actualizat) * self.rata)
+        self._actualizat = acum
+
+    def _refuza(self, prioritate: int, motiv: str, reincearca_dupa: float):
+        refuzate.inc(resursa=self.nume, prioritate=NUME_PRIORITATI[prioritate], motiv=motiv)
+        raise ResursaOcupata(self.nume, max(1.0, reincearca_dupa))
+
+    def adancime(self, prioritate: int) -> int:
+        return sum(1 for p, _, f in self._coada if p == prioritate and not f.done())
+
+    async def obtine(self, prioritate: int = PRIORITATE_INTERACTIV):
+        """Așteaptă un jeton pentru un apel; ResursaOcupata dacă ar dura prea mult."""
+        start = time.perf_counter()
+        self._reumple()
+        # Aproape de cota zilnică, restul cotei rămâne pentru cererile interactive
+        if self.cota is not None and self.cota.aproape_epuizata() and prioritate > PRIORITATE_INTERACTIV:
+            self._refuza(prioritate, "cota", 3600)
+
+        if not self._coada and self.jetoane >= 1:
+            self.jetoane -= 1
+            self._inregistreaza(prioritate, start)
+            return
+
+        # Câte jetoane trebuie să apară până la rândul nostru
+        inainte = sum(1 for p, _, f in self._coada if p <= prioritate and not f.done())
+        estimat = (inainte + 1 - self.jetoane) / self.rata
+        maxim = ASTEPTARE_MAXIMA[prioritate]
+        if estimat > maxim:
+            self._refuza(prioritate, "asteptare", estimat)
+        if len(self._coada) >= SCHED_MAX_QUEUE:
+            self._refuza(prioritate, "coada", estimat)
+
+        viitor = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._coada, (prioritate, next(self._secventa), viitor))
+        self._programeaza()
+        try:
+            await asyncio.wait({viitor}, timeout=maxim)
+        finally:
+            if not viitor.done():
+                viitor.cancel()
+        if viitor.cancelled():
+            self._refuza(prioritate, "asteptare", estimat)
+        self._inregistreaza(prioritate, start)
+
+    def _inregistreaza(self, prioritate: int, start: float):
+        asteptare.observa(time.perf_counter() - start, resursa=self.nume, prioritate=NUME_PRIORITATI[prioritate])
+        if self.cota is not None:
+            self.cota.inregistreaza()
+
+    def _programeaza(self):
+        if self._programat is not None or not self._coada:
+            return
+        intarziere = max(0.0, (1 - self.jetoane) / self.rata)
+        self._programat = asyncio.get_running_loop().call_later(intarziere, self._distribuie)
+
+    def _distribuie(self):
+        self._programat = None
+        self._reumple()
+        while self._coada and self.jetoane >= 1:
+            _, _, viitor = heapq.heappop(self._coada)
+            if viitor.done():
+                continue
+            self.jetoane -= 1
+            viitor.set_result(None)
+        # Scoatem din vârful cozii cererile renunțate, ca să nu programăm degeaba
+        while self._coada and self._coada[0][2].done():
+            heapq.heappop(self._coada)
+        self._programeaza()
+
+    def stats(self) -> dict:
+        return {
+            "jetoane": round(self.jetoane, 2),
+            "coada": {NUME_PRIORITATI[p]: self.adancime(p) for p in NUME_PRIORITATI},
+        }
+
+
+cota_gemini = CotaZilnica(GEMINI_DAILY_QUOTA, "gemini")
+planificatoare = {
+    "google_cse": Planificator("google_cse", CSE_RATE_PER_MINUTE, search_cache.cota),
+    "gemini": Planificator("gemini", GEMINI_RATE_PER_MINUTE, cota_gemini),
+}
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable
+
+from services.cache import Intrare, LRUCache
+from services.cache_partajat import cache_partajat
+
+# Cache pe două niveluri pentru produsele OpenFoodFacts: LRU în memorie
+# în fața unui fișier SQLite care supraviețuiește restarturilor.
+PRODUCT_CACHE_DB = os.getenv("PRODUCT_CACHE_DB", "./products_cache.db")
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "5000"))
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", str(24 * 3600)))
+PRODUCT_CACHE_STALE_TTL = float(os.getenv("PRODUCT_CACHE_STALE_TTL", str(7 * 24 * 3600)))
+PRODUCT_CACHE_NEGATIVE_TTL = float(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", "600"))
+
+Loader = Callable[[str], Awaitable[dict | None]]
+
+
+class ProductCache:
+    def __init__(self, path: str = PRODUCT_CACHE_DB, maxsize: int = PRODUCT_CACHE_SIZE):
+        self.path = path
+        self.memorie = LRUCache(maxsize)
+        self.disk_hits = 0
+        self.reimprospatari = 0
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._in_reimprospatare: set[str] = set()
+        self._taskuri: set[asyncio.Task] = set()
+
+    # --- nivelul SQLite ---
+
+    def _conexiune(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS produse ("
+                " code TEXT PRIMARY KEY,"
+                " data TEXT,"
+                " salvat_la REAL NOT NULL,"
+                " ttl REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _citeste_disk(self, code: str):
+        with self._lock:
+            return self._conexiune().execute(
+                "SELECT data, salvat_la, ttl FROM produse WHERE code = ?", (code,)
+            ).fetchone()
+
+    def _scrie_disk(self, code: str, produs: dict | None, salvat_la: float, ttl: float):
+        data = json.dumps(produs, ensure_ascii=False) if produs is not None else None
+        with self._lock:
+            conn = self._conexiune()
+            conn.execute(
+                "INSERT OR REPLACE INTO produse (code, data, salvat_la, ttl) VALUES (?, ?, ?, ?)",
+                (code, data, salvat_la, ttl),
+            )
+            conn.commit()
+
+    # --- API ---
+
+    def _salveaza_memorie(self, code: str, produs: dict | None, salvat_la: float | None = None) -> Intrare:
+        if produs is None:
+            return self.memorie.set(code, None, PRODUCT_CACHE_NEGATIVE_TTL, salvat_la=salvat_la)
+        return self.memorie.set(code, produs, PRODUCT_CACHE_TTL, PRODUCT_CACHE_STALE_TTL, salvat_la=salvat_la)
+
+    async def _cauta(self, code: str) -> Intrare | None:
+        intrare = self.memorie.get(code)
+        if intrare is not None:
+            return intrare
+
+        rand = await asyncio.to_thread(self._citeste_disk, code)
+        if rand is None:
+            return None
+        data, salvat_la, _ = rand
+        produs = json.loads(data) if data is not None else None
+        intrare = self._salveaza_memorie(code, produs, salvat_la)
+        if not intrare.utilizabila():
+            self.memorie.pop(code)
+            return None
+        self.disk_hits += 1
+        return intrare
+
+    async def put(self, code: str, produs: dict | None):
+        salvat_la = time.time()
+        self._salveaza_memorie(code, produs, salvat_la)
+        ttl = PRODUCT_CACHE_TTL if produs is not None else PRODUCT_CACHE_NEGATIVE_TTL
+        await asyncio.to_thread(self._scrie_disk, code, produs, salvat_la, ttl)
+
+    async def cauta(self, code: str, loader: Loader) -> Intrare | None:
+        # Ca get(), dar fără apel către upstream la miss
+        intrare = await self._cauta(code)
+        if intrare is not None and not intrare.proaspata():
+            self._reimprospateaza_in_fundal(code, loader)
+        return intrare
+
+    async def get(self, code: str, loader: Loader) -> dict | None:
+        intrare = await self.cauta(code, loader)
+        if intrare is not None:
+            return intrare.valoare
+
+        # Fișierul SQLite e comun worker-ilor; doar unul dintre ei întreabă upstream-ul
+        return await cache_partajat.o_singura_data(
+            "produs", code, lambda: self._incarca(code, loader), lambda: self._cauta(code)
+        )
+
+    async def _incarca(self, code: str, loader: Loader) -> dict | None:
+        produs = await loader(code)
+        await self.put(code, produs)
+        return produs
+
+    def _reimprospateaza_in_fundal(self, code: str, loader: Loader):
+        if code in self._in_reimprospatare:
+            return
+        self._in_reimprospatare.add(code)
+
+        async def reimprospateaza():
+            revendicat = False
+            try:
+                # Alt worker reîmprospătează deja produsul
+                if cache_partajat.activ:
+                    revendicat = await asyncio.to_thread(cache_partajat.revendica, "produs", code)
+                    if not revendicat:
+                        return
+                await self.put(code, await loader(code))
+                self.reimprospatari += 1
+            except Exception as e:
+                # Păstrăm intrarea veche; încercăm din nou la următoarea cerere
+                print(f"Reîmprospătare eșuată pentru {code}:", e)
+            finally:
+                if revendicat:
+                    await asyncio.to_thread(cache_partajat.elibereaza, "produs", code)
+                self._in_reimprospatare.discard(code)
+
+        task = asyncio.create_task(reimprospateaza())
+        self._taskuri.add(task)
+        task.add_done_callback(self._taskuri.discard)
+
+    def stats(self) -> dict:
+        return {**self.memorie.stats(), "disk_hits": self.disk_hits, "refreshes": self.reimprospatari}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+product_cache = ProductCache()
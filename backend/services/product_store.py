@@ -0,0 +1,148 @@
+import json
+import os
+import sqlite3
+import threading
+
+# Copie locală a produselor OpenFoodFacts, populată din dump-uri cu
+# services/off_import.py. Citirile sunt căutări după cheie primară, deci
+# rulează direct pe event loop fără să-l blocheze în mod vizibil.
+PRODUCT_STORE_DB = os.getenv("PRODUCT_STORE_DB", "./products_store.db")
+PRODUCT_STORE_ENABLED = os.getenv("PRODUCT_STORE_ENABLED", "1") == "1"
+
+# Doar câmpurile folosite de routere; restul produsului nu este descărcat
+# de la OpenFoodFacts și nici păstrat la import
+CAMPURI_PRODUS = [
+    "code",
+    "product_name",
+    "brands",
+    "quantity",
+    "nutriscore_grade",
+    "nova_group",
+    "ecoscore_grade",
+    "categories",
+    "categories_tags",
+    "generic_name",
+    "packaging",
+    "ingredients_origin",
+    "labels_tags",
+    "allergens_tags",
+    "additives_tags",
+    "nutriments",
+    "serving_size",
+    "last_modified_t",
+]
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS produse ("
+    " code TEXT PRIMARY KEY,"
+    " data TEXT NOT NULL,"
+    " last_modified_t INTEGER NOT NULL DEFAULT 0"
+    ") WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS categorii ("
+    " tag TEXT NOT NULL,"
+    " code TEXT NOT NULL,"
+    " PRIMARY KEY (tag, code)"
+    ") WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_categorii_code ON categorii (code)",
+    "CREATE INDEX IF NOT EXISTS idx_produse_modificat ON produse (last_modified_t, code)",
+    "CREATE TABLE IF NOT EXISTS meta (cheie TEXT PRIMARY KEY, valoare TEXT)",
+]
+
+
+class ProductStore:
+    def __init__(self, path: str = PRODUCT_STORE_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def disponibil(self) -> bool:
+        return PRODUCT_STORE_ENABLED and os.path.exists(self.path)
+
+    def _conexiune(self) -> sqlite3.Connection:
+        # O conexiune per fir de execuție; sqlite3 nu le poate partaja implicit
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for sql in SCHEMA:
+                conn.execute(sql)
+            self._local.conn = conn
+        return conn
+
+    def get(self, code: str) -> dict | None:
+        if not self.disponibil():
+            return None
+        rand = self._conexiune().execute(
+            "SELECT data FROM produse WHERE code = ?", (code,)
+        ).fetchone()
+        return json.loads(rand[0]) if rand else None
+
+    def coduri_din_categorie(self, tag: str, limit: int | None = None) -> list[str]:
+        if not self.disponibil():
+            return []
+        sql = "SELECT code FROM categorii WHERE tag = ?"
+        params: tuple = (tag,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params = (tag, limit)
+        return [r[0] for r in self._conexiune().execute(sql, params)]
+
+    def lot_modificate(self, dupa_t: int, dupa_code: str, limit: int = 1000) -> list[dict]:
+        # Paginare după (last_modified_t, code), folosită la reconstruirea indecșilor
+        if not self.disponibil():
+            return []
+        randuri = self._conexiune().execute(
+            "SELECT data FROM produse WHERE (last_modified_t, code) > (?, ?)"
+            " ORDER BY last_modified_t, code LIMIT ?",
+            (dupa_t, dupa_code, limit),
+        ).fetchall()
+        return [json.loads(r[0]) for r in randuri]
+
+    def versiuni(self, coduri: list[str]) -> dict[str, int]:
+        if not coduri:
+            return {}
+        semne = ",".join("?" * len(coduri))
+        return dict(self._conexiune().execute(
+            f"SELECT code, last_modified_t FROM produse WHERE code IN ({semne})", coduri
+        ))
+
+    def scrie(self, produse: list[dict]):
+        conn = self._conexiune()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO produse (code, data, last_modified_t) VALUES (?, ?, ?)",
+                [
+                    (p["code"], json.dumps(p, ensure_ascii=False, separators=(",", ":")), int(p.get("last_modified_t") or 0))
+                    for p in produse
+                ],
+            )
+            conn.executemany(
+                "DELETE FROM categorii WHERE code = ?", [(p["code"],) for p in produse]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO categorii (tag, code) VALUES (?, ?)",
+                [(tag, p["code"]) for p in produse for tag in p.get("categories_tags") or []],
+            )
+
+    def set_meta(self, cheie: str, valoare: str):
+        conn = self._conexiune()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (cheie, valoare) VALUES (?, ?)", (cheie, valoare))
+
+    def get_meta(self, cheie: str) -> str | None:
+        rand = self._conexiune().execute("SELECT valoare FROM meta WHERE cheie = ?", (cheie,)).fetchone()
+        return rand[0] if rand else None
+
+    def numar_produse(self) -> int:
+        if not self.disponibil():
+            return 0
+        return self._conexiune().execute("SELECT COUNT(*) FROM produse").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+product_store = ProductStore()
@@ -1,13 +1,94 @@
-import google.generativeai as genai
 import os
+from typing import AsyncIterator, Hashable
 from dotenv import load_dotenv
+from services import metrics
+from services.cache import LRUCache
+from services.planificator import PRIORITATE_INTERACTIV, PRIORITATE_RETETA, ResursaOcupata, planificatoare
+from services.search_cache import normalizeaza_query
+from services.singleflight import SingleFlight
 
 load_dotenv()
 
+GEMINI_CACHE_SIZE = int(os.getenv("GEMINI_CACHE_SIZE", "2000"))
+GEMINI_CACHE_TTL = float(os.getenv("GEMINI_CACHE_TTL", str(24 * 3600)))
+
 API_KEY = "GEMINI_API_KEY" 
 
-genai.configure(api_key=API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
+# GEMINI_BASE_URL trimite cererile către alt server (ex. stand-in-ul din bench/)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+
+_model = None
+
+
+def get_model():
+    # SDK-ul Gemini este greu de importat; îl încărcăm abia la primul apel
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+
+        if GEMINI_BASE_URL:
+            genai.configure(api_key=API_KEY, transport="rest", client_options={"api_endpoint": GEMINI_BASE_URL})
+        else:
+            genai.configure(api_key=API_KEY)
+        _model = genai.GenerativeModel("gemini-1.5-flash")
+    return _model
+
+zbor_gemini = SingleFlight("gemini")
+# Răspunsuri deja generate, după intrările normalizate ale promptului
+cache_gemini = LRUCache(GEMINI_CACHE_SIZE)
+
+
+def cheie_reteta(cos: list[str], dieta: str = "", scop: str = "", timp: str = "", context: str = "") -> tuple:
+    # Același coș în altă ordine sau cu altă scriere dă aceeași cheie
+    ingrediente = tuple(sorted({normalizeaza_query(i) for i in cos if i.strip()}))
+    return ("reteta", ingrediente, *(normalizeaza_query(x) for x in (dieta, scop, timp, context)))
+
+
+async def genereaza_text(
+    prompt: str, cheie: Hashable | None = None, prioritate: int = PRIORITATE_INTERACTIV
+) -> str:
+    cheie = cheie if cheie is not None else prompt
+    intrare = cache_gemini.get(cheie)
+    if intrare is not None:
+        return intrare.valoare
+
+    # Același prompt cerut simultan de mai mulți utilizatori -> un singur apel Gemini
+    # Fără jeton de la planificator ridicăm ResursaOcupata; apelantul decide cum degradează
+    async def apel():
+        await planificatoare["gemini"].obtine(prioritate)
+        with metrics.apel_upstream("gemini"):
+            response = await get_model().generate_content_async(prompt)
+            return response.text
+
+    text = await zbor_gemini.do(cheie, apel)
+    cache_gemini.set(cheie, text, GEMINI_CACHE_TTL)
+    return text
+
+
+async def genereaza_text_stream(
+    prompt: str, cheie: Hashable | None = None, prioritate: int = PRIORITATE_INTERACTIV
+) -> AsyncIterator[str]:
+    """Produce textul pe bucăți, pe măsură ce Gemini le generează.
+
+    Un răspuns din cache vine într-o singură bucată; un răspuns complet
+    generat aici este pus în cache pentru cererile următoare.
+    """
+    cheie = cheie if cheie is not None else prompt
+    intrare = cache_gemini.get(cheie)
+    if intrare is not None:
+        yield intrare.valoare
+        return
+
+    await planificatoare["gemini"].obtine(prioritate)
+    bucati = []
+    with metrics.apel_upstream("gemini_stream"):
+        response = await get_model().generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                bucati.append(chunk.text)
+                yield chunk.text
+    cache_gemini.set(cheie, "".join(bucati), GEMINI_CACHE_TTL)
+
 
 def construieste_prompt(cos: list[str], dieta: str = "", scop: str = "", timp: str = "", context: str = ""):
     prompt = f"Am următoarele ingrediente: {', '.join(cos)}.\n"
@@ -46,10 +127,11 @@ Sfaturi nutriționale:
     return prompt
 
 
-def genereaza_reteta(cos, dieta="", scop="", timp="", context=""):
+async def genereaza_reteta(cos, dieta="", scop="", timp="", context=""):
     prompt = construieste_prompt(cos, dieta, scop, timp, context)
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        return await genereaza_text(prompt, cheie_reteta(cos, dieta, scop, timp, context), PRIORITATE_RETETA)
+    except ResursaOcupata:
+        raise
     except Exception as e:
         return f"Eroare la generare: {str(e)}"
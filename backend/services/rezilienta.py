@@ -0,0 +1,215 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+import httpx
+
+# Protecții per upstream, aplicate de http_client.get:
+# - circuit breaker: după prea multe eșecuri, cererile eșuează imediat, iar
+#   apelanții trec pe datele din cache în loc să aștepte timeout-ul;
+# - hedging: dacă un apel depășește p95-ul observat, pornim o a doua cerere
+#   și o folosim pe prima care reușește;
+# - buget de reîncercări: hedging-ul și reîncercările consumă jetoane câștigate
+#   ca fracțiune din trafic, deci nu pot multiplica încărcarea unui upstream căzut.
+# Host-urile cu cotă plătită per cerere (Custom Search) nu primesc hedging și
+# reîncercări: fiecare cerere în plus ar consuma cota fără jeton de la planificator.
+CB_WINDOW = int(os.getenv("CB_WINDOW", "20"))
+CB_MIN_CALLS = int(os.getenv("CB_MIN_CALLS", "10"))
+CB_FAILURE_RATIO = float(os.getenv("CB_FAILURE_RATIO", "0.5"))
+CB_OPEN_SECONDS = float(os.getenv("CB_OPEN_SECONDS", "30"))
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "1") == "1"
+HEDGE_MIN_MS = float(os.getenv("HEDGE_MIN_MS", "50"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+HEDGE_MIN_SAMPLES = 20
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MAX = float(os.getenv("RETRY_BUDGET_MAX", "10"))
+HOSTURI_CU_COTA = {h.strip() for h in os.getenv("UPSTREAM_QUOTA_HOSTS", "www.googleapis.com").split(",") if h.strip()}
+
+INCHIS, DESCHIS, SEMIDESCHIS = "inchis", "deschis", "semideschis"
+STARI = {INCHIS: 0, SEMIDESCHIS: 1, DESCHIS: 2}
+
+
+class CircuitDeschis(httpx.TransportError):
+    """Upstream-ul este marcat indisponibil; apelul nu a mai fost trimis."""
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self.stare = INCHIS
+        self.deschideri = 0
+        self._rezultate: deque[bool] = deque(maxlen=CB_WINDOW)
+        self._deschis_la = 0.0
+        self._proba_in_curs = False
+
+    def permite(self) -> bool:
+        if self.stare == DESCHIS and time.monotonic() - self._deschis_la >= CB_OPEN_SECONDS:
+            self.stare = SEMIDESCHIS
+        if self.stare == SEMIDESCHIS:
+            # O singură cerere de probă; restul eșuează rapid până aflăm rezultatul
+            if self._proba_in_curs:
+                return False
+            self._proba_in_curs = True
+            return True
+        return self.stare == INCHIS
+
+    def succes(self):
+        if self.stare != INCHIS:
+            self.stare = INCHIS
+            self._rezultate.clear()
+        self._proba_in_curs = False
+        self._rezultate.append(True)
+
+    def abandon(self):
+        # Apelantul a renunțat (anulare); proba nu a dat un rezultat
+        self._proba_in_curs = False
+
+    def esec(self):
+        self._proba_in_curs = False
+        if self.stare == SEMIDESCHIS:
+            self._deschide()
+            return
+        self._rezultate.append(False)
+        esecuri = self._rezultate.count(False)
+        if len(self._rezultate) >= CB_MIN_CALLS and esecuri / len(self._rezultate) >= CB_FAILURE_RATIO:
+            self._deschide()
+
+    def _deschide(self):
+        self.stare = DESCHIS
+        self.deschideri += 1
+        self._deschis_la = time.monotonic()
+
+
+class BugetReincercari:
+    def __init__(self):
+        self.jetoane = RETRY_BUDGET_MAX
+
+    def depune(self):
+        self.jetoane = min(RETRY_BUDGET_MAX, self.jetoane + RETRY_BUDGET_RATIO)
+
+    def retrage(self) -> bool:
+        if self.jetoane < 1:
+            return False
+        self.jetoane -= 1
+        return True
+
+
+class Upstream:
+    def __init__(self, nume: str):
+        self.nume = nume
+        self.cu_cota = nume in HOSTURI_CU_COTA
+        self.breaker = CircuitBreaker()
+        self.buget = BugetReincercari()
+        self.hedges = 0
+        self.reincercari = 0
+        self.respinse = 0
+        self._durate: deque[float] = deque(maxlen=HEDGE_WINDOW)
+
+    def prag_hedge(self) -> float | None:
+        # p95 al apelurilor reușite recente, în secunde
+        if not HEDGE_ENABLED or self.cu_cota or len(self._durate) < HEDGE_MIN_SAMPLES:
+            return None
+        durate = sorted(self._durate)
+        return max(HEDGE_MIN_MS / 1000, durate[int(len(durate) * 0.95) - 1])
+
+    async def apel(self, trimite: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        if not self.breaker.permite():
+            self.respinse += 1
+            raise CircuitDeschis(f"Circuit deschis pentru {self.nume}")
+        self.buget.depune()
+
+        async def incercare():
+            start = time.perf_counter()
+            response = await trimite()
+            if not _esec(response):
+                self._durate.append(time.perf_counter() - start)
+            return response
+
+        sarcini = {asyncio.create_task(incercare())}
+        hedge = self.prag_hedge()
+        # Fără reîncercări pentru host-urile cu cotă
+        reincercat = self.cu_cota
+        ultimul_raspuns: httpx.Response | None = None
+        ultima_eroare: Exception | None = None
+        try:
+            while sarcini:
+                gata, sarcini = await asyncio.wait(sarcini, timeout=hedge, return_when=asyncio.FIRST_COMPLETED)
+                if not gata:
+                    # Apelul a depășit p95: cerere de rezervă, o singură dată
+                    hedge = None
+                    if self.buget.retrage():
+                        self.hedges += 1
+                        sarcini.add(asyncio.create_task(incercare()))
+                    continue
+
+                for sarcina in gata:
+                    try:
+                        response = sarcina.result()
+                    except httpx.HTTPError as e:
+                        ultima_eroare = e
+                        continue
+                    if _esec(response):
+                        ultimul_raspuns = response
+                        # 429 înseamnă limită de rată sau cotă: o reîncercare doar ar agrava-o
+                        reincercat = reincercat or response.status_code == 429
+                        continue
+                    self.breaker.succes()
+                    return response
+
+                # Toate încercările terminate au eșuat: o reîncercare, dacă bugetul permite
+                if not sarcini and not reincercat and self.buget.retrage():
+                    reincercat = True
+                    self.reincercari += 1
+                    hedge = None
+                    sarcini.add(asyncio.create_task(incercare()))
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+        except Exception:
+            # Orice altă eroare (ex. URL invalid) închide proba; altfel circuitul ar rămâne blocat
+            self.breaker.esec()
+            raise
+        finally:
+            for sarcina in sarcini:
+                sarcina.cancel()
+
+        self.breaker.esec()
+        if ultimul_raspuns is not None:
+            return ultimul_raspuns
+        raise ultima_eroare
+
+    def stats(self) -> dict:
+        prag = self.prag_hedge()
+        return {
+            "stare": self.breaker.stare,
+            "deschideri": self.breaker.deschideri,
+            "respinse": self.respinse,
+            "hedges": self.hedges,
+            "reincercari": self.reincercari,
+            "jetoane": round(self.buget.jetoane, 2),
+            "prag_hedge_ms": round(prag * 1000, 1) if prag is not None else None,
+        }
+
+
+def _esec(response: httpx.Response) -> bool:
+    # 404 e un răspuns valid (ex. cod de bare necunoscut); doar 5xx și 429 contează
+    return response.status_code >= 500 or response.status_code == 429
+
+
+upstreamuri: dict[str, Upstream] = {}
+
+
+def marcheaza_cu_cota(url: str):
+    # Pentru host-uri configurate prin variabile de mediu (ex. CSE_BASE_URL)
+    host = httpx.URL(url).host
+    HOSTURI_CU_COTA.add(host)
+    if host in upstreamuri:
+        upstreamuri[host].cu_cota = True
+
+
+def pentru(host: str) -> Upstream:
+    upstream = upstreamuri.get(host)
+    if upstream is None:
+        upstream = upstreamuri[host] = Upstream(host)
+    return upstream
@@ -1,8 +1,19 @@
-import requests
+import asyncio
+import os
+import time
+import httpx
+from services import http_client, rezilienta
+from services.cache_partajat import cache_partajat
+from services.planificator import PRIORITATE_INTERACTIV, ResursaOcupata, planificatoare
+from services.search_cache import search_cache, cheie_cautare
+from services.singleflight import SingleFlight
 from urllib.parse import urlparse
 
 API_KEY = "GOOGLE_API_KEY"
 CX_ID = "GOOGLE_CX_ID"
+CSE_BASE_URL = os.getenv("CSE_BASE_URL", "https://www.googleapis.com/customsearch/v1")
+# Fiecare cerere Custom Search e taxată: fără hedging și reîncercări
+rezilienta.marcheaza_cu_cota(CSE_BASE_URL)
 
 MAGAZINE = [
     "kaufland.ro",
@@ -16,8 +27,36 @@ MAGAZINE = [
     "profi.ro",
 ]
 
-def search_google_cse(query: str, site: str = "") -> list[dict]:
-    url = "https://www.googleapis.com/customsearch/v1"
+# Căutarea pe magazine rulează în paralel, limitat și cu termen global
+MAGAZINE_CONCURRENCY = int(os.getenv("MAGAZINE_CONCURRENCY", "5"))
+MAGAZINE_DEADLINE = float(os.getenv("MAGAZINE_DEADLINE", "4"))
+
+zbor_cse = SingleFlight("google_cse")
+
+async def search_google_cse(query: str, site: str = "", prioritate: int = PRIORITATE_INTERACTIV) -> list[dict]:
+    # Aproape de limita zilnică sau cu Custom Search indisponibil servim și rezultate expirate
+    accepta_stale = search_cache.cota.aproape_epuizata() or not http_client.disponibil(CSE_BASE_URL)
+    await search_cache.incarca_partajat(query, site)
+    rezultate = search_cache.get(query, site, accepta_stale=accepta_stale)
+    if rezultate is not None:
+        return rezultate
+
+    # Cererile identice simultane împart un singur apel Custom Search, și între worker-i
+    cheie = cheie_cautare(query, site)
+
+    async def din_alt_worker():
+        intrare = await asyncio.to_thread(cache_partajat.get, "cautare", cheie, False)
+        return intrare if intrare is not None and intrare.proaspata() else None
+
+    rezultate = await zbor_cse.do(
+        cheie,
+        lambda: cache_partajat.o_singura_data("cse", cheie, lambda: _cere_cse(query, site, prioritate), din_alt_worker),
+    )
+    return [dict(r) for r in rezultate]
+
+
+async def _cere_cse(query: str, site: str, prioritate: int) -> list[dict]:
+    url = CSE_BASE_URL
     full_query = f"{query} site:{site}" if site else query
 
     params = {
@@ -27,13 +66,27 @@ def search_google_cse(query: str, site: str = "") -> list[dict]:
         
     }
 
-    response = requests.get(url, params=params)
+    # Planificatorul împarte cota între clase; când o refuză, servim ce avem în cache
+    try:
+        await planificatoare["google_cse"].obtine(prioritate)
+    except ResursaOcupata as e:
+        print(f"CSE amânat pentru {site}:", e)
+        return search_cache.get(query, site, accepta_stale=True, numara=False) or []
+
+    try:
+        response = await http_client.get(url, params=params)
+    except httpx.HTTPError as e:
+        print(f"Eroare CSE pentru {site}:", e)
+        return search_cache.get(query, site, accepta_stale=True, numara=False) or []
+
     if response.status_code != 200:
         print(f"Eroare CSE pentru {site}:", response.text)
-        return []
+        if response.status_code == 429 or "dailyLimitExceeded" in response.text:
+            search_cache.cota.marcheaza_epuizata()
+        return search_cache.get(query, site, accepta_stale=True, numara=False) or []
 
     data = response.json()
-    return [
+    rezultate = [
         {
             "titlu": item.get("title"),
             "link": item.get("link"),
@@ -44,13 +97,63 @@ def search_google_cse(query: str, site: str = "") -> list[dict]:
         }
         for item in data.get("items", []) 
     ]
-
-def cauta_pe_magazine(query: str) -> dict:
-    rezultate = {}
-    for site in MAGAZINE:
-        rezultate[site.split(".")[0].capitalize()] = search_google_cse(query, site)
+    search_cache.set(query, site, rezultate)
+    await search_cache.publica(query, site)
     return rezultate
 
+async def cauta_pe_magazine_progresiv(
+    query: str, deadline: float = MAGAZINE_DEADLINE, prioritate: int = PRIORITATE_INTERACTIV
+):
+    # Produce (magazin, rezultat) pe măsură ce fiecare magazin răspunde;
+    # magazinele care depășesc termenul sunt raportate cu status "timeout".
+    semafor = asyncio.Semaphore(MAGAZINE_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    async def un_magazin(site: str):
+        async with semafor:
+            t0 = time.perf_counter()
+            rezultate = await search_google_cse(query, site, prioritate)
+            return rezultate, round((time.perf_counter() - t0) * 1000, 1)
+
+    sarcini = {asyncio.create_task(un_magazin(site)): site for site in MAGAZINE}
+    in_asteptare = set(sarcini)
+    try:
+        while in_asteptare:
+            ramas = start + deadline - loop.time()
+            if ramas <= 0:
+                break
+            gata, in_asteptare = await asyncio.wait(
+                in_asteptare, timeout=ramas, return_when=asyncio.FIRST_COMPLETED
+            )
+            for sarcina in gata:
+                site = sarcini[sarcina]
+                magazin = site.split(".")[0].capitalize()
+                if sarcina.exception() is not None:
+                    print(f"Eroare CSE pentru {site}:", sarcina.exception())
+                    yield magazin, {"site": site, "status": "eroare", "durata_ms": None, "rezultate": []}
+                    continue
+                rezultate, durata_ms = sarcina.result()
+                yield magazin, {"site": site, "status": "ok", "durata_ms": durata_ms, "rezultate": rezultate}
+
+        durata_ms = round((loop.time() - start) * 1000, 1)
+        for sarcina in in_asteptare:
+            sarcina.cancel()
+            site = sarcini[sarcina]
+            yield site.split(".")[0].capitalize(), {
+                "site": site, "status": "timeout", "durata_ms": durata_ms, "rezultate": []
+            }
+    finally:
+        for sarcina in in_asteptare:
+            sarcina.cancel()
+
+
+async def cauta_pe_magazine(query: str) -> dict:
+    return {
+        magazin: rezultat["rezultate"]
+        async for magazin, rezultat in cauta_pe_magazine_progresiv(query)
+    }
+
 
 def grupeaza_rezultate_dupa_magazin(rezultate: list[dict], query: str) -> dict:
     grupate = {}
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+import unicodedata
+from datetime import datetime
+
+from services.cache import LRUCache
+from services.cache_partajat import cache_partajat
+
+try:
+    from zoneinfo import ZoneInfo
+    # Cota Custom Search se resetează la miezul nopții, ora Pacificului
+    FUS_ORAR_COTA = ZoneInfo("America/Los_Angeles")
+except Exception:
+    FUS_ORAR_COTA = None
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "10000"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(12 * 3600)))
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", str(7 * 24 * 3600)))
+CSE_DAILY_QUOTA = int(os.getenv("CSE_DAILY_QUOTA", "100"))
+# Peste acest procent din cotă servim intrări expirate în loc să mai apelăm Google
+CSE_QUOTA_RESERVE = float(os.getenv("CSE_QUOTA_RESERVE", "0.9"))
+# Cât de des aducem din cache-ul partajat consumul celorlalți worker-i
+QUOTA_SYNC_INTERVAL = float(os.getenv("QUOTA_SYNC_INTERVAL", "2"))
+
+
+def normalizeaza_query(query: str) -> str:
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    return " ".join(query.split())
+
+
+def cheie_cautare(query: str, site: str = "") -> str:
+    return f"{site.lower().strip()}|{normalizeaza_query(query)}"
+
+
+class CotaZilnica:
+    def __init__(self, limita: int = CSE_DAILY_QUOTA, nume: str = "google_cse"):
+        self.nume = nume
+        self.limita = limita
+        self.folosite = 0
+        self.epuizata = False
+        self._zi = self._ziua_curenta()
+        # Apeluri încă netrimise contorului comun și sincronizarea în curs
+        self._nesincronizate = 0
+        self._sincronizat_la = 0.0
+        self._sincronizare: asyncio.Task | None = None
+
+    @staticmethod
+    def _ziua_curenta() -> str:
+        return datetime.now(FUS_ORAR_COTA).strftime("%Y-%m-%d")
+
+    def _verifica_ziua(self):
+        zi = self._ziua_curenta()
+        if zi != self._zi:
+            self._zi = zi
+            self.folosite = 0
+            self.epuizata = False
+            self._nesincronizate = 0
+
+    def inregistreaza(self):
+        self._verifica_ziua()
+        self.folosite += 1
+        self._nesincronizate += 1
+        self._sincronizeaza_in_fundal()
+
+    def _sincronizeaza_in_fundal(self):
+        # Cu mai mulți worker-i, contorul din cache-ul partajat ține cota comună;
+        # îl actualizăm pe un fir separat, ca event loop-ul să nu aștepte SQLite
+        if not cache_partajat.activ or self._sincronizare is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sincronizare = loop.create_task(self._sincronizeaza())
+
+    async def _sincronizeaza(self):
+        zi, trimise = self._zi, self._nesincronizate
+        self._nesincronizate = 0
+        try:
+            total = await asyncio.to_thread(cache_partajat.incrementeaza, f"cota_{self.nume}", zi, trimise)
+        except Exception as e:
+            print("Eroare la sincronizarea cotei:", e)
+            if zi == self._zi:
+                self._nesincronizate += trimise
+            return
+        finally:
+            self._sincronizat_la = time.monotonic()
+            self._sincronizare = None
+        if zi == self._zi:
+            self.folosite = max(self.folosite, total + self._nesincronizate)
+        if self._nesincronizate:
+            self._sincronizeaza_in_fundal()
+
+    def marcheaza_epuizata(self):
+        self._verifica_ziua()
+        self.epuizata = True
+
+    def aproape_epuizata(self) -> bool:
+        self._verifica_ziua()
+        if time.monotonic() - self._sincronizat_la >= QUOTA_SYNC_INTERVAL:
+            self._sincronizeaza_in_fundal()
+        return self.epuizata or self.folosite >= self.limita * CSE_QUOTA_RESERVE
+
+    def stats(self) -> dict:
+        self._verifica_ziua()
+        return {"zi": self._zi, "folosite": self.folosite, "limita": self.limita, "epuizata": self.epuizata}
+
+
+class SearchCache:
+    def __init__(self, maxsize: int = SEARCH_CACHE_SIZE):
+        self.memorie = LRUCache(maxsize)
+        self.cota = CotaZilnica()
+        self.hits = 0
+        self.misses = 0
+        self.stale_servite = 0
+
+    def get(self, query: str, site: str = "", accepta_stale: bool = False, numara: bool = True) -> list[dict] | None:
+        # Copiem rezultatele: routerele le modifică la grupare
+        intrare = self.memorie.get(cheie_cautare(query, site))
+        if intrare is not None and intrare.proaspata():
+            self.hits += numara
+            return [dict(r) for r in intrare.valoare]
+        if intrare is not None and accepta_stale:
+            self.stale_servite += 1
+            return [dict(r) for r in intrare.valoare]
+        self.misses += numara
+        return None
+
+    async def incarca_partajat(self, query: str, site: str = ""):
+        # Poate a căutat-o (sau a reîmprospătat-o) deja alt worker; citirea SQLite
+        # rulează pe un fir separat, înainte de get()
+        if not cache_partajat.activ:
+            return
+        cheie = cheie_cautare(query, site)
+        intrare = self.memorie.peek(cheie)
+        if intrare is not None and intrare.proaspata():
+            return
+        partajata = await asyncio.to_thread(cache_partajat.get, "cautare", cheie)
+        if partajata is not None and (intrare is None or partajata.salvat_la > intrare.salvat_la):
+            self.memorie.pune(cheie, partajata)
+
+    def salvat_la(self, query: str, site: str = "") -> float | None:
+        intrare = self.memorie.peek(cheie_cautare(query, site))
+        return intrare.salvat_la if intrare is not None else None
+
+    def set(self, query: str, site: str, rezultate: list[dict]):
+        self.memorie.set(
+            cheie_cautare(query, site),
+            [dict(r) for r in rezultate],
+            SEARCH_CACHE_TTL,
+            SEARCH_CACHE_STALE_TTL,
+        )
+
+    async def publica(self, query: str, site: str = ""):
+        # Pune intrarea din memorie și în cache-ul partajat, pe un fir separat
+        cheie = cheie_cautare(query, site)
+        intrare = self.memorie.peek(cheie)
+        if cache_partajat.activ and intrare is not None:
+            await asyncio.to_thread(cache_partajat.set, "cautare", cheie, intrare)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.memorie),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "stale_served": self.stale_servite,
+            "quota": self.cota.stats(),
+        }
+
+
+search_cache = SearchCache()
@@ -0,0 +1,48 @@
+import hashlib
+import json
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# orjson este opțional: de câteva ori mai rapid decât json și cu ieșire compactă
+try:
+    import orjson
+
+    def serializeaza(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    orjson = None
+
+    def serializeaza(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def etag(corp: bytes) -> str:
+    return '"' + hashlib.blake2b(corp, digest_size=16).hexdigest() + '"'
+
+
+def _nemodificat(request: Request, eticheta: str, modificat_la: float | None) -> bool:
+    # If-None-Match are prioritate; If-Modified-Since contează doar în lipsa lui
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etichete = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+        return "*" in etichete or eticheta in etichete
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and modificat_la:
+        try:
+            return int(modificat_la) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def raspuns_conditionat(request: Request, continut, cache_control: str, modificat_la: float | None = None) -> Response:
+    """Răspuns JSON cu ETag din conținut, Last-Modified și 304 pentru clienții la zi."""
+    corp = serializeaza(continut)
+    antete = {"ETag": etag(corp), "Cache-Control": cache_control}
+    if modificat_la:
+        antete["Last-Modified"] = formatdate(modificat_la, usegmt=True)
+    if _nemodificat(request, antete["ETag"], modificat_la):
+        return Response(status_code=304, headers=antete)
+    return Response(corp, media_type="application/json", headers=antete)
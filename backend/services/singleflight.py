@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+# Toate instanțele, după nume, pentru statistici
+zboruri: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Cererile identice simultane împart un singur apel către upstream.
+
+    Primul apelant pornește apelul într-un task; ceilalți îl așteaptă prin
+    `asyncio.shield`, deci anularea unui client nu îi afectează pe restul.
+    """
+
+    def __init__(self, nume: str):
+        self.nume = nume
+        self.apeluri = 0
+        self.deduplicate = 0
+        self._in_zbor: dict[Hashable, asyncio.Task] = {}
+        zboruri[nume] = self
+
+    def in_zbor(self) -> int:
+        return len(self._in_zbor)
+
+    async def do(self, cheie: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_zbor.get(cheie)
+        if task is not None:
+            self.deduplicate += 1
+        else:
+            self.apeluri += 1
+            task = asyncio.ensure_future(fn())
+            self._in_zbor[cheie] = task
+            task.add_done_callback(lambda t: self._termina(cheie, t))
+        return await asyncio.shield(task)
+
+    def _termina(self, cheie: Hashable, task: asyncio.Task):
+        if self._in_zbor.get(cheie) is task:
+            del self._in_zbor[cheie]
+        # Marcăm excepția ca preluată chiar dacă toți apelanții au renunțat
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"calls": self.apeluri, "deduplicated": self.deduplicate, "in_flight": len(self._in_zbor)}
@@ -0,0 +1,16 @@
+import json
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+# Antete care opresc buffering-ul în proxy-uri (nginx), ca bucățile să ajungă imediat
+ANTETE_SSE = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def eveniment(data, nume: str | None = None) -> str:
+    linii = f"event: {nume}\n" if nume else ""
+    return linii + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def raspuns_sse(evenimente: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(evenimente, media_type="text/event-stream", headers=ANTETE_SSE)
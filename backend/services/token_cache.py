@@ -0,0 +1,40 @@
+import os
+import time
+
+from services.cache import LRUCache
+
+# Token verificat -> datele utilizatorului, ca /me și celelalte rute autentificate
+# să nu decodeze JWT-ul și să nu interogheze baza de date la fiecare apel.
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE):
+        self.memorie = LRUCache(maxsize)
+        self._tokenuri: dict[str, set[str]] = {}
+
+    def get(self, token: str) -> dict | None:
+        intrare = self.memorie.get(token)
+        return intrare.valoare if intrare is not None else None
+
+    def set(self, token: str, utilizator: dict, expira_la: float):
+        # Nu păstrăm intrarea după expirarea token-ului
+        ttl = min(AUTH_CACHE_TTL, expira_la - time.time())
+        if ttl <= 0:
+            return
+        self.memorie.set(token, utilizator, ttl)
+        # Păstrăm doar token-urile încă prezente în LRU
+        tokenuri = {t for t in self._tokenuri.get(utilizator["email"], ()) if t in self.memorie}
+        tokenuri.add(token)
+        self._tokenuri[utilizator["email"]] = tokenuri
+
+    def invalideaza(self, email: str):
+        for token in self._tokenuri.pop(email, ()):
+            self.memorie.pop(token)
+
+    def stats(self) -> dict:
+        return self.memorie.stats()
+
+
+token_cache = TokenCache()
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from routers import alternatives
+from services.alternatives_index import AlternativesIndex
+
+LAPTE = {
+    "code": "5941234000017",
+    "product_name": "Lapte integral 3,5%",
+    "nutriscore_grade": "b",
+    "categories_tags": ["en:dairies", "en:milks"],
+}
+LAPTE_BATUT = {
+    "code": "5941234000024",
+    "product_name": "Lapte bătut",
+    "nutriscore_grade": "c",
+    "categories_tags": ["en:dairies", "en:milks"],
+}
+LAPTE_CAPRA = {
+    "code": "5941234000031",
+    "product_name": "Lapte de capră",
+    "nutriscore_grade": "a",
+    "categories_tags": ["en:dairies", "en:milks"],
+}
+
+
+class CerereFalsa:
+    def __init__(self, body: dict):
+        self._body = body
+
+    async def json(self) -> dict:
+        return self._body
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = AlternativesIndex()
+    descarcate = []
+
+    async def get_product(code):
+        return LAPTE_BATUT
+
+    async def descarca_categorie(slug):
+        descarcate.append(slug)
+        return [LAPTE, LAPTE_BATUT, LAPTE_CAPRA]
+
+    monkeypatch.setattr(alternatives, "alternatives_index", index)
+    monkeypatch.setattr(alternatives, "get_product", get_product)
+    monkeypatch.setattr(alternatives, "descarca_categorie", descarca_categorie)
+    index.descarcate = descarcate
+    return index
+
+
+def cere(body: dict):
+    return asyncio.run(alternatives.get_healthier_alternatives(CerereFalsa(body)))
+
+
+def test_categorie_partiala_este_descarcata(index):
+    # Produse văzute doar la /barcode: categoria nu e completă
+    index.adauga(LAPTE)
+    index.adauga(LAPTE_BATUT)
+
+    rezultat = cere({"name": "Lapte bătut", "code": LAPTE_BATUT["code"]})
+
+    assert index.descarcate == ["dairies"]
+    assert rezultat[0] == "Lapte de capră"
+
+
+def test_categorie_descarcata_nu_mai_este_ceruta(index):
+    index.adauga_categorie("dairies", [LAPTE, LAPTE_BATUT, LAPTE_CAPRA])
+
+    rezultat = cere({"name": "Lapte bătut", "code": LAPTE_BATUT["code"]})
+
+    assert index.descarcate == []
+    assert rezultat[0] == "Lapte de capră"
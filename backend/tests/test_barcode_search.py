@@ -0,0 +1,47 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routers import barcode
+from services.search_cache import search_cache
+
+PRODUS = {"code": "5941234000017", "product_name": "Lapte integral", "brands": "Zuzu"}
+REZULTATE = [{"titlu": "Lapte Zuzu", "link": "https://www.emag.ro/lapte", "descriere": "", "imagine": None}]
+
+
+def client(monkeypatch, cautari: list) -> TestClient:
+    async def get_product(code):
+        return PRODUS
+
+    async def search_google_cse(query):
+        cautari.append(query)
+        return REZULTATE
+
+    monkeypatch.setattr(barcode, "get_product", get_product)
+    monkeypatch.setattr(barcode, "search_google_cse", search_google_cse)
+    app = FastAPI()
+    app.include_router(barcode.router)
+    return TestClient(app)
+
+
+def test_revalidarea_nu_cauta_cand_rezultatul_e_in_cache(monkeypatch):
+    search_cache.memorie.clear()
+    search_cache.set("zuzu lapte integral", "", REZULTATE)
+    cautari = []
+    c = client(monkeypatch, cautari)
+
+    etag = c.get("/barcode-search/5941234000017").headers["ETag"]
+    raspuns = c.get("/barcode-search/5941234000017", headers={"If-None-Match": etag})
+
+    assert raspuns.status_code == 304
+    assert cautari == []
+
+
+def test_fara_cache_se_cauta(monkeypatch):
+    search_cache.memorie.clear()
+    cautari = []
+    c = client(monkeypatch, cautari)
+
+    raspuns = c.get("/barcode-search/5941234000017")
+
+    assert raspuns.status_code == 200
+    assert cautari == ["zuzu lapte integral"]
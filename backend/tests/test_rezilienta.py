@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import rezilienta
+
+
+class Raspuns:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+def deschide(upstream: rezilienta.Upstream):
+    # Circuit trecut în semideschis: următorul apel este proba
+    upstream.breaker.stare = rezilienta.SEMIDESCHIS
+
+
+def test_eroare_neasteptata_in_proba_nu_blocheaza_circuitul():
+    upstream = rezilienta.Upstream("test.invalid")
+    deschide(upstream)
+
+    async def invalid():
+        raise ValueError("cerere invalidă")
+
+    with pytest.raises(ValueError):
+        asyncio.run(upstream.apel(invalid))
+    assert upstream.breaker.stare == rezilienta.DESCHIS
+
+    # După CB_OPEN_SECONDS o nouă probă trebuie să fie permisă
+    upstream.breaker._deschis_la -= rezilienta.CB_OPEN_SECONDS
+
+    async def ok():
+        return Raspuns(200)
+
+    assert asyncio.run(upstream.apel(ok)).status_code == 200
+    assert upstream.breaker.stare == rezilienta.INCHIS
+
+
+def test_429_nu_este_reincercat():
+    upstream = rezilienta.Upstream("test.invalid")
+    apeluri = []
+
+    async def limitat():
+        apeluri.append(1)
+        return Raspuns(429)
+
+    assert asyncio.run(upstream.apel(limitat)).status_code == 429
+    assert len(apeluri) == 1
+
+
+def test_eroare_http_este_reincercata():
+    upstream = rezilienta.Upstream("test.invalid")
+    apeluri = []
+
+    async def cazut():
+        apeluri.append(1)
+        raise httpx.ConnectError("refuzat")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(upstream.apel(cazut))
+    assert len(apeluri) == 2
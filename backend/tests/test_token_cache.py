@@ -0,0 +1,37 @@
+import time
+
+from services.token_cache import TokenCache
+
+
+def utilizator(first_name: str) -> dict:
+    return {"id": 1, "email": "a@b.ro", "first_name": first_name, "last_name": "Pop", "avatar_url": None}
+
+
+def test_invalideaza_sterge_tokenurile_utilizatorului():
+    cache = TokenCache()
+    expira_la = time.time() + 3600
+    cache.set("t1", utilizator("Ana"), expira_la)
+    cache.set("t2", utilizator("Ana"), expira_la)
+    assert cache.get("t1")["first_name"] == "Ana"
+
+    cache.invalideaza("a@b.ro")
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+
+
+def test_invalideaza_nu_atinge_alti_utilizatori():
+    cache = TokenCache()
+    expira_la = time.time() + 3600
+    cache.set("t1", utilizator("Ana"), expira_la)
+    cache.set("t3", {**utilizator("Ion"), "email": "c@d.ro"}, expira_la)
+
+    cache.invalideaza("a@b.ro")
+
+    assert cache.get("t3")["first_name"] == "Ion"
+
+
+def test_token_expirat_nu_intra_in_cache():
+    cache = TokenCache()
+    cache.set("t1", utilizator("Ana"), time.time() - 1)
+    assert cache.get("t1") is None